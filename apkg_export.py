@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Write converted word rows straight into an Anki deck package (.apkg).
+
+The rows come from word_basic_to_csv.convert() (rank, level, word, phonetic,
+meaning, full_meaning, example, source). Each row becomes one note with the
+fields Word / Phonetic / Meaning / FullMeaning; the level tags become Anki tags.
+
+- Notes are inserted into the collection SQLite in batches (executemany).
+- Note GUIDs are derived from the lowercase word, ids and timestamps are fixed,
+  so rebuilding the same input gives a byte-identical package and re-importing
+  it into Anki updates existing notes instead of duplicating them.
+- The collection is written to a scratch file and streamed into the zip,
+  never loaded into memory as a whole.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+# Fixed epoch (seconds) used for every timestamp in the package, so rebuilds are deterministic.
+DEFAULT_TIMESTAMP = 1_704_067_200  # 2024-01-01 00:00:00 UTC
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+MODEL_ID = 1_704_067_200_001
+NOTE_ID_BASE = 1_704_067_200_000  # ms-style ids, one per note
+DEFAULT_DECK_NAME = "COCA 2024 美音终极版"
+
+FIELD_NAMES = ["Word", "Phonetic", "Meaning", "FullMeaning"]
+TAG_SPLIT_RE = re.compile(r"[、,，;；\s]+")
+
+ANKI_SCHEMA = """
+CREATE TABLE col (
+    id integer primary key, crt integer not null, mod integer not null,
+    scm integer not null, ver integer not null, dty integer not null,
+    usn integer not null, ls integer not null, conf text not null,
+    models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE notes (
+    id integer primary key, guid text not null, mid integer not null,
+    mod integer not null, usn integer not null, tags text not null,
+    flds text not null, sfld integer not null, csum integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE cards (
+    id integer primary key, nid integer not null, did integer not null,
+    ord integer not null, mod integer not null, usn integer not null,
+    type integer not null, queue integer not null, due integer not null,
+    ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null,
+    odid integer not null, flags integer not null, data text not null
+);
+CREATE TABLE revlog (
+    id integer primary key, cid integer not null, usn integer not null,
+    ease integer not null, ivl integer not null, lastIvl integer not null,
+    factor integer not null, time integer not null, type integer not null
+);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_usn on notes (usn);
+CREATE INDEX ix_cards_usn on cards (usn);
+CREATE INDEX ix_revlog_usn on revlog (usn);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_cards_sched on cards (did, queue, due);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+CREATE INDEX ix_notes_csum on notes (csum);
+"""
+
+CARD_CSS = """.card {
+ font-family: arial;
+ font-size: 20px;
+ text-align: center;
+ color: black;
+ background-color: white;
+}
+.phonetic { color: #666; }
+.full { font-size: 16px; text-align: left; }
+"""
+
+FRONT_TEMPLATE = "{{Word}}<div class=phonetic>{{Phonetic}}</div>"
+BACK_TEMPLATE = (
+    "{{FrontSide}}<hr id=answer>{{Meaning}}"
+    "<div class=full>{{FullMeaning}}</div>"
+)
+
+
+def deck_id_for(deck_name: str) -> int:
+    """Stable deck id derived from the deck name."""
+    digest = hashlib.sha1(deck_name.encode("utf-8")).digest()
+    return 1_000_000_000 + int.from_bytes(digest[:4], "big")
+
+
+def guid_for(word: str) -> str:
+    """
+    Stable note GUID derived from the lowercase word.
+    Example: guid_for("The") == guid_for("the")
+    """
+    digest = hashlib.sha1(f"20000words:{word.lower()}".encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def field_checksum(text: str) -> int:
+    """Anki's csum: first 8 hex digits of sha1(sort field) as an int."""
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def level_to_tags(level: str) -> str:
+    """
+    Convert a level column value into an Anki tag string (space separated, padded).
+    Example: "初中、高中" -> " 初中 高中 "
+    """
+    tags = [t for t in TAG_SPLIT_RE.split(level or "") if t]
+    if not tags:
+        return ""
+    return " " + " ".join(dict.fromkeys(tags)) + " "
+
+
+def _collection_json(deck_name: str, timestamp: int) -> Tuple[str, str, str, str]:
+    did = deck_id_for(deck_name)
+    conf = {
+        "nextPos": 1,
+        "estTimes": True,
+        "activeDecks": [did],
+        "sortType": "noteFld",
+        "timeLim": 0,
+        "sortBackwards": False,
+        "addToCur": True,
+        "curDeck": did,
+        "newBury": True,
+        "newSpread": 0,
+        "dueCounts": True,
+        "curModel": str(MODEL_ID),
+        "collapseTime": 1200,
+    }
+    model = {
+        "id": MODEL_ID,
+        "name": "20000words",
+        "type": 0,
+        "mod": timestamp,
+        "usn": -1,
+        "sortf": 0,
+        "did": did,
+        "tmpls": [
+            {
+                "name": "Card 1",
+                "ord": 0,
+                "qfmt": FRONT_TEMPLATE,
+                "afmt": BACK_TEMPLATE,
+                "did": None,
+                "bqfmt": "",
+                "bafmt": "",
+            }
+        ],
+        "flds": [
+            {"name": name, "ord": i, "sticky": False, "rtl": False, "font": "Arial", "size": 20, "media": []}
+            for i, name in enumerate(FIELD_NAMES)
+        ],
+        "css": CARD_CSS,
+        "latexPre": "\\documentclass[12pt]{article}\n\\special{papersize=3in,5in}\n"
+        "\\usepackage[utf8]{inputenc}\n\\usepackage{amssymb,amsmath}\n"
+        "\\pagestyle{empty}\n\\setlength{\\parindent}{0in}\n\\begin{document}\n",
+        "latexPost": "\\end{document}",
+        "tags": [],
+        "vers": [],
+        "req": [[0, "any", [0]]],
+    }
+    deck_common = {
+        "mod": timestamp,
+        "usn": -1,
+        "lrnToday": [0, 0],
+        "revToday": [0, 0],
+        "newToday": [0, 0],
+        "timeToday": [0, 0],
+        "collapsed": False,
+        "browserCollapsed": False,
+        "desc": "",
+        "dyn": 0,
+        "conf": 1,
+        "extendNew": 0,
+        "extendRev": 0,
+    }
+    decks = {
+        "1": dict(deck_common, id=1, name="Default"),
+        str(did): dict(deck_common, id=did, name=deck_name),
+    }
+    dconf = {
+        "1": {
+            "id": 1,
+            "name": "Default",
+            "mod": 0,
+            "usn": 0,
+            "maxTaken": 60,
+            "autoplay": True,
+            "timer": 0,
+            "replayq": True,
+            "dyn": False,
+            "new": {
+                "delays": [1, 10],
+                "ints": [1, 4, 7],
+                "initialFactor": 2500,
+                "order": 1,
+                "perDay": 20,
+                "bury": True,
+                "separate": True,
+            },
+            "rev": {
+                "perDay": 200,
+                "ease4": 1.3,
+                "fuzz": 0.05,
+                "minSpace": 1,
+                "ivlFct": 1,
+                "maxIvl": 36500,
+                "bury": True,
+                "hardFactor": 1.2,
+            },
+            "lapse": {
+                "delays": [10],
+                "mult": 0,
+                "minInt": 1,
+                "leechFails": 8,
+                "leechAction": 0,
+            },
+        }
+    }
+    dumps = lambda obj: json.dumps(obj, ensure_ascii=False, sort_keys=True)  # noqa: E731
+    return dumps(conf), dumps({str(MODEL_ID): model}), dumps(decks), dumps(dconf)
+
+
+def _iter_note_rows(
+    rows: Iterable[Sequence[object]],
+    *,
+    deck_id: int,
+    timestamp: int,
+) -> Iterator[Tuple[tuple, tuple]]:
+    """
+    Yield (note_row, card_row) tuples for sqlite executemany().
+    Rows without a word are skipped; a repeated word gets a rank-qualified GUID.
+    """
+    seen_guids = set()
+    seq = 0
+    for row in rows:
+        rank, level, word, phonetic, meaning, full_meaning = (str(v) for v in row[:6])
+        if not word:
+            continue
+        guid = guid_for(word)
+        if guid in seen_guids:
+            guid = guid_for(f"{word}#{rank}")
+        seen_guids.add(guid)
+
+        seq += 1
+        note_id = NOTE_ID_BASE + seq
+        fields = [html.escape(v, quote=False) for v in (word, phonetic, meaning, full_meaning)]
+        note = (
+            note_id, guid, MODEL_ID, timestamp, -1, level_to_tags(level),
+            "\x1f".join(fields), fields[0], field_checksum(fields[0]), 0, "",
+        )
+        # new card: type=0, queue=0, due=position in the deck
+        card = (note_id, note_id, deck_id, 0, timestamp, -1, 0, 0, seq, 0, 0, 0, 0, 0, 0, 0, 0, "")
+        yield note, card
+
+
+def build_collection(
+    rows: Iterable[Sequence[object]],
+    collection_path: Path,
+    *,
+    deck_name: str = DEFAULT_DECK_NAME,
+    timestamp: int = DEFAULT_TIMESTAMP,
+    batch_size: int = 2000,
+) -> int:
+    """
+    Create an Anki collection SQLite file from converted rows.
+    Returns the number of notes written.
+    """
+    did = deck_id_for(deck_name)
+    conf, models, decks, dconf = _collection_json(deck_name, timestamp)
+
+    con = sqlite3.connect(str(collection_path))
+    try:
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        con.executescript(ANKI_SCHEMA)
+        con.execute(
+            "INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+            (timestamp, timestamp * 1000, timestamp * 1000, conf, models, decks, dconf),
+        )
+
+        count = 0
+        pairs = _iter_note_rows(rows, deck_id=did, timestamp=timestamp)
+        while True:
+            batch: List[Tuple[tuple, tuple]] = list(islice(pairs, batch_size))
+            if not batch:
+                break
+            con.executemany(
+                "INSERT INTO notes VALUES (?,?,?,?,?,?,?,?,?,?,?)", [n for n, _ in batch]
+            )
+            con.executemany(
+                "INSERT INTO cards VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", [c for _, c in batch]
+            )
+            count += len(batch)
+        con.commit()
+    finally:
+        con.close()
+    return count
+
+
+def write_apkg(
+    rows: Iterable[Sequence[object]],
+    output_path: Path,
+    *,
+    deck_name: str = DEFAULT_DECK_NAME,
+    timestamp: int = DEFAULT_TIMESTAMP,
+    batch_size: int = 2000,
+) -> int:
+    """
+    Stream converted rows into an .apkg file.
+    Returns the number of notes written.
+    """
+    output_path = Path(output_path)
+    with tempfile.TemporaryDirectory(prefix=".apkg-", dir=output_path.parent) as tmp:
+        tmp_dir = Path(tmp)
+        collection = tmp_dir / "collection.anki2"
+        count = build_collection(
+            rows, collection, deck_name=deck_name, timestamp=timestamp, batch_size=batch_size
+        )
+
+        tmp_zip = tmp_dir / "deck.apkg"
+        with zipfile.ZipFile(tmp_zip, "w") as zf:
+            info = zipfile.ZipInfo("collection.anki2", date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with collection.open("rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            media = zipfile.ZipInfo("media", date_time=ZIP_DATE_TIME)
+            media.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(media, "{}")
+        os.replace(tmp_zip, output_path)
+    return count
+
+
+def main() -> None:
+    # imported here so this module can be used by word_basic_to_csv without a cycle
+    from itertools import chain
+
+    from compress_io import open_text
+    from word_basic_to_csv import build_label_index, build_label_sets, convert
+
+    p = argparse.ArgumentParser(description="Convert one or more word-list TXT files into an Anki .apkg deck.")
+    p.add_argument("output", type=Path, help="output .apkg path")
+    p.add_argument("inputs", type=Path, nargs="+", help="input TXT files, in deck order")
+    p.add_argument("--encoding", default="utf-8", help="input file encoding (default: utf-8)")
+    p.add_argument("--deck-name", default=DEFAULT_DECK_NAME, help=f"deck name (default: {DEFAULT_DECK_NAME})")
+    p.add_argument(
+        "--label",
+        action="append",
+        default=[],
+        help="repeatable: add a tag from a word list, like --label 小学=广州小学英语__仅单词.txt",
+    )
+    p.add_argument(
+        "--auto-labels",
+        action="store_true",
+        help="auto load level word lists from known *__仅单词.txt filenames in --auto-labels-dir",
+    )
+    p.add_argument(
+        "--auto-labels-dir",
+        type=Path,
+        default=None,
+        help="directory to search for known *__仅单词.txt files (default: first input file directory)",
+    )
+    p.add_argument("--batch-size", type=int, default=2000, help="notes per INSERT batch (default: 2000)")
+    args = p.parse_args()
+
+    label_sets = build_label_sets(
+        args.label,
+        auto_labels_dir=args.auto_labels_dir or args.inputs[0].parent,
+        auto_labels=args.auto_labels,
+        encoding=args.encoding,
+    )
+
+    handles = [open_text(path, "r", encoding=args.encoding, errors="replace") for path in args.inputs]
+    try:
+        label_index = build_label_index(label_sets)
+        rows = chain.from_iterable(convert(fh, label_index=label_index, level_sep="、") for fh in handles)
+        n = write_apkg(rows, args.output, deck_name=args.deck_name, batch_size=args.batch_size)
+    finally:
+        for fh in handles:
+            fh.close()
+    print(f"已写入 {n} 条笔记 -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
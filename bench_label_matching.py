@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark label tagging: exact matching vs inflection-aware (--lemmatize) matching.
+
+Three measurements over the COCA TXT chunks:
+- lookup only: the single dict probe per row, on pre-extracted words
+- tagging: the probe plus append_level for every matched label (lemma matching
+  tags more rows, so it does more of this real work)
+- end to end: convert() over every chunk (parsing dominates)
+
+Each is run --repeat times (exact and lemma interleaved) and the best time is
+reported, with the lemma variant's slowdown relative to exact matching.
+
+The gate is end to end: the run fails (exit 1) when lemma matching makes
+convert() more than --max-slowdown percent (default 5) slower. Lookup-only and
+tagging are reported but not gated: they are roughly 40-70% slower with lemma
+matching (e.g. 1.14M vs 0.76M rows/s tagging; noisy), because the merged dict has ~4x
+the keys (13k -> 53k) and probes miss the CPU cache more often. Probing a
+separate variant dict only after an exact miss measured slower still. That is
+~0.3 us per row against ~100 us of parsing, so end to end the two stay within
+noise.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+from compress_io import open_text
+from lemma_index import load_lemma_table
+from word_basic_to_csv import (
+    COPY_MARKERS,
+    append_level,
+    build_label_index,
+    build_label_sets,
+    convert,
+    extract_fields,
+)
+
+
+def _best_of(repeat: int, *fns: Callable[[], int]) -> List[Tuple[float, int]]:
+    """Best time and result of each fn; runs are interleaved so machine noise hits all alike."""
+    best = [float("inf")] * len(fns)
+    results = [0] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            t0 = time.perf_counter()
+            results[i] = fn()
+            best[i] = min(best[i], time.perf_counter() - t0)
+    return list(zip(best, results))
+
+
+def probe_words(words: Sequence[str], label_index: Dict[str, Tuple[str, ...]]) -> int:
+    hits = 0
+    for w in words:
+        if label_index.get(w):
+            hits += 1
+    return hits
+
+
+def tag_words(words: Sequence[str], label_index: Dict[str, Tuple[str, ...]], sep: str) -> int:
+    tagged = 0
+    for w in words:
+        level = ""
+        for lbl in label_index.get(w, ()):
+            level = append_level(level, lbl, sep=sep)
+        if level:
+            tagged += 1
+    return tagged
+
+
+def convert_all(paths: Sequence[Path], label_index: Dict[str, Tuple[str, ...]]) -> int:
+    tagged = 0
+    for path in paths:
+        with open_text(path, "r", encoding="utf-8", errors="replace") as fh:
+            for row in convert(fh, level_sep="、", label_index=label_index):
+                if row[1]:
+                    tagged += 1
+    return tagged
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(
+        description=(
+            "Compare label tagging throughput: exact vs lemma matching. "
+            "Fails when convert() end to end is more than --max-slowdown percent slower with lemma matching; "
+            "lookup-only and tagging numbers are informational."
+        )
+    )
+    p.add_argument(
+        "--dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="directory with the COCA*.txt chunks and *__仅单词.txt lists (default: this script's directory)",
+    )
+    p.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is kept (default: 5)")
+    p.add_argument(
+        "--skip-convert",
+        action="store_true",
+        help="only run the lookup/tagging benchmarks (no end-to-end gate)",
+    )
+    p.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=5.0,
+        help="allowed end-to-end convert() slowdown of lemma vs exact matching, in percent (default: 5)",
+    )
+    args = p.parse_args()
+
+    paths = sorted(
+        path for path in args.dir.glob("COCA*.txt") if not any(m in path.stem for m in COPY_MARKERS)
+    )
+    label_sets = build_label_sets([], auto_labels_dir=args.dir, auto_labels=True)
+    vocabulary: Set[str] = set()
+    for _, words in label_sets:
+        vocabulary |= words
+    lemma_table = load_lemma_table(vocabulary)
+
+    words: List[str] = []
+    for path in paths:
+        with open_text(path, "r", encoding="utf-8", errors="replace") as fh:
+            for raw in fh:
+                if not raw.strip() or raw.lstrip().startswith("#"):
+                    continue
+                words.append(extract_fields(raw.rstrip("\n"))[0].lower())
+    print(f"{len(paths)} 个文件, {len(words)} 行, {len(label_sets)} 个标签集合, {len(lemma_table)} 个词形")
+
+    exact_index = build_label_index(label_sets)
+    lemma_index = build_label_index(label_sets, lemma_table=lemma_table)
+    measurements: List[Tuple[str, Callable[[], int], Callable[[], int]]] = [
+        ("lookup only", lambda: probe_words(words, exact_index), lambda: probe_words(words, lemma_index)),
+        ("tagging", lambda: tag_words(words, exact_index, "、"), lambda: tag_words(words, lemma_index, "、")),
+    ]
+    if not args.skip_convert:
+        measurements.append(
+            (
+                "convert() end to end",
+                lambda: convert_all(paths, exact_index),
+                lambda: convert_all(paths, lemma_index),
+            )
+        )
+
+    slowdowns: Dict[str, float] = {}
+    for name, exact_fn, lemma_fn in measurements:
+        (t_exact, n_exact), (t_lemma, n_lemma) = _best_of(args.repeat, exact_fn, lemma_fn)
+        slowdown = slowdowns[name] = 100 * (t_lemma / t_exact - 1)
+        print(f"{name}:")
+        print(f"  exact : {len(words) / t_exact:>12,.0f} rows/s  ({n_exact} tagged)")
+        print(f"  lemma : {len(words) / t_lemma:>12,.0f} rows/s  ({n_lemma} tagged)  {slowdown:+.1f}%")
+
+    if not args.skip_convert:
+        slowdown = slowdowns["convert() end to end"]
+        if slowdown > args.max_slowdown:
+            print(f"FAIL: convert() end to end {slowdown:+.1f}% > {args.max_slowdown:.1f}%")
+            sys.exit(1)
+        print(f"OK: convert() end to end {slowdown:+.1f}% <= {args.max_slowdown:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
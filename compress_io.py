@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Transparent compressed text I/O, chosen by file extension.
+
+- "*.gz"  -> gzip
+- "*.xz"  -> xz (lzma)
+- "*.bz2" -> bzip2
+- anything else is opened as a plain text file
+
+Everything is streamed; nothing is staged in temp files. When writing with
+threads > 1 and a parallel compressor (pigz / xz -T / pbzip2) is on PATH, the
+output is piped through it; otherwise the stdlib compressor is used.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import shutil
+import subprocess
+from pathlib import Path
+from typing import IO, List, Optional
+
+COMPRESSION_SUFFIXES = (".gz", ".xz", ".bz2")
+
+# default levels when none is given (gzip.open defaults to 9, which is slow for little gain)
+DEFAULT_LEVELS = {".gz": 6, ".xz": 6, ".bz2": 9}
+
+
+def compression_suffix(path: Path) -> str:
+    """
+    Return the compression suffix of a path, or "" for plain files.
+    Example: compression_suffix(Path("a.csv.gz")) -> ".gz"
+    """
+    suffix = Path(path).suffix.lower()
+    return suffix if suffix in COMPRESSION_SUFFIXES else ""
+
+
+def strip_compression_suffix(path: Path) -> Path:
+    """
+    Drop a trailing compression suffix.
+    Example: strip_compression_suffix(Path("a.csv.gz")) -> Path("a.csv")
+    """
+    path = Path(path)
+    return path.with_suffix("") if compression_suffix(path) else path
+
+
+def _external_command(suffix: str, level: int, threads: int) -> Optional[List[str]]:
+    if suffix == ".gz" and shutil.which("pigz"):
+        return ["pigz", "-c", f"-{level}", "-p", str(threads)]
+    if suffix == ".xz" and shutil.which("xz"):
+        return ["xz", "-c", f"-{level}", f"-T{threads}"]
+    if suffix == ".bz2" and shutil.which("pbzip2"):
+        return ["pbzip2", "-c", f"-{level}", f"-p{threads}"]
+    return None
+
+
+class _ProcessTextWriter(io.TextIOWrapper):
+    """Text stream feeding an external compressor; close() waits for it to finish."""
+
+    def __init__(self, proc: subprocess.Popen, sink: IO[bytes], **kwargs) -> None:
+        super().__init__(proc.stdin, **kwargs)
+        self._proc = proc
+        self._sink = sink
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            super().close()
+        finally:
+            returncode = self._proc.wait()
+            self._sink.close()
+        if returncode:
+            raise OSError(f"compressor exited with status {returncode}: {self._proc.args[0]}")
+
+
+def open_text(
+    path: Path,
+    mode: str = "r",
+    *,
+    encoding: str = "utf-8",
+    errors: Optional[str] = None,
+    newline: Optional[str] = None,
+    compresslevel: Optional[int] = None,
+    threads: int = 1,
+) -> IO[str]:
+    """
+    Open a text file for reading ("r") or writing ("w"), compressed or not by extension.
+    compresslevel / threads only apply when writing a compressed file.
+    """
+    if mode not in ("r", "w"):
+        raise ValueError(f"unsupported mode: {mode!r}")
+    path = Path(path)
+    suffix = compression_suffix(path)
+    if not suffix:
+        return path.open(mode, encoding=encoding, errors=errors, newline=newline)
+
+    text_mode = mode + "t"
+    if mode == "r":
+        opener = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}[suffix]
+        return opener(path, text_mode, encoding=encoding, errors=errors, newline=newline)
+
+    level = DEFAULT_LEVELS[suffix] if compresslevel is None else compresslevel
+    if threads > 1:
+        cmd = _external_command(suffix, level, threads)
+        if cmd:
+            sink = path.open("wb")
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=sink)
+            return _ProcessTextWriter(proc, sink, encoding=encoding, errors=errors, newline=newline)
+
+    if suffix == ".gz":
+        return gzip.open(path, text_mode, compresslevel=level, encoding=encoding, errors=errors, newline=newline)
+    if suffix == ".xz":
+        return lzma.open(path, text_mode, preset=level, encoding=encoding, errors=errors, newline=newline)
+    return bz2.open(path, text_mode, compresslevel=level, encoding=encoding, errors=errors, newline=newline)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Structural diff between two generations of converted CSVs.
+
+Each side is a directory of COCA*.csv chunks or a single CSV file. The old side
+is loaded into a hash table keyed by (global rank, word); the new side is
+streamed and joined against it. convert() numbers each chunk from 1, so a chunk
+whose ranks start below its "__A-B" filename range is shifted by A - 1.
+The report contains:
+- rows only in old / only in new
+- per-column change counts for matched rows, with a few sample rows each
+- level tags added / removed, counted per tag
+- regressions: a non-empty phonetic / meaning / full_meaning that became empty,
+  or a new row with an empty phonetic / meaning
+- a warning when few rows match, i.e. the join key itself changed
+
+Output is JSON or Markdown. With --fail-on-regression the exit status is 1 when
+any regression or warning is found, so the diff can gate parser changes.
+"""
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from word_basic_to_csv import CSV_HEADER, find_converted_csvs, iter_converted_rows, split_level
+
+KEY_COLUMNS = ("rank", "word")
+COMPARED_COLUMNS = [c for c in CSV_HEADER if c not in KEY_COLUMNS]
+REGRESSION_COLUMNS = ("phonetic", "meaning", "full_meaning")
+# a new row (no old counterpart) must still have these
+REQUIRED_COLUMNS = ("phonetic", "meaning")
+# below this share of the smaller side matched, the join key is probably broken
+MIN_OVERLAP = 0.5
+CHUNK_RANGE_RE = re.compile(r"__(\d+)-(\d+)\.csv")
+
+RowKey = Tuple[int, str]
+
+
+def resolve_csvs(path: Path) -> List[Path]:
+    """A directory means all of its COCA*.csv chunks; a file means just that file."""
+    if path.is_dir():
+        found = find_converted_csvs(path)
+        if not found:
+            raise FileNotFoundError(f"未找到 COCA CSV 文件: {path}")
+        return found
+    if not path.exists():
+        raise FileNotFoundError(f"CSV 文件不存在: {path}")
+    return [path]
+
+
+def chunk_rank_offset(path: Path, first_rank: int) -> int:
+    """
+    Offset that turns a chunk's ranks into global ranks.
+    Example: "...__10001-12000.csv" starting at rank 1 -> 10000; already global -> 0
+    """
+    m = CHUNK_RANGE_RE.search(path.name)
+    if not m:
+        return 0
+    start = int(m.group(1))
+    return start - 1 if first_rank < start else 0
+
+
+def iter_keyed_rows(csv_paths: Sequence[Path]) -> Iterator[Tuple[RowKey, Dict[str, str]]]:
+    for path in csv_paths:
+        offset = None
+        for row in iter_converted_rows([path]):
+            try:
+                rank = int((row.get("rank") or "").strip())
+            except ValueError:
+                continue
+            if offset is None:
+                offset = chunk_rank_offset(path, rank)
+            yield (rank + offset, (row.get("word") or "").strip()), row
+
+
+def diff_rows(
+    old_paths: Sequence[Path],
+    new_paths: Sequence[Path],
+    *,
+    samples: int = 5,
+) -> Dict[str, object]:
+    """Compare two CSV sets and return the report as a plain dict."""
+    old: Dict[RowKey, Dict[str, str]] = dict(iter_keyed_rows(old_paths))
+    old_count = len(old)
+
+    new_count = 0
+    matched = 0
+    added: List[RowKey] = []
+    column_changes: Counter = Counter()
+    column_samples: Dict[str, List[Dict[str, object]]] = {c: [] for c in COMPARED_COLUMNS}
+    tags_added: Counter = Counter()
+    tags_removed: Counter = Counter()
+    regressions: List[Dict[str, object]] = []
+
+    for key, new_row in iter_keyed_rows(new_paths):
+        new_count += 1
+        old_row = old.pop(key, None)
+        if old_row is None:
+            added.append(key)
+            for col in REQUIRED_COLUMNS:
+                if not (new_row.get(col) or "").strip():
+                    regressions.append({"rank": key[0], "word": key[1], "column": col, "old": "(new row)", "new": ""})
+            continue
+        matched += 1
+        for col in COMPARED_COLUMNS:
+            before = old_row.get(col) or ""
+            after = new_row.get(col) or ""
+            if before == after:
+                continue
+            column_changes[col] += 1
+            change = {"rank": key[0], "word": key[1], "old": before, "new": after}
+            if len(column_samples[col]) < samples:
+                column_samples[col].append(change)
+            if col in REGRESSION_COLUMNS and before.strip() and not after.strip():
+                regressions.append(dict(change, column=col))
+            if col == "level":
+                old_tags, new_tags = set(split_level(before)), set(split_level(after))
+                tags_added.update(new_tags - old_tags)
+                tags_removed.update(old_tags - new_tags)
+
+    removed = sorted(old)
+    warnings: List[str] = []
+    if old_count and new_count and matched < MIN_OVERLAP * min(old_count, new_count):
+        warnings.append(
+            f"only {matched} of {min(old_count, new_count)} rows matched on (rank, word): "
+            "ranks or words were renumbered, so most changes show up as removed + added"
+        )
+    return {
+        "old_rows": old_count,
+        "new_rows": new_count,
+        "matched_rows": matched,
+        "removed_rows": len(removed),
+        "added_rows": len(added),
+        "removed_samples": [{"rank": r, "word": w} for r, w in removed[:samples]],
+        "added_samples": [{"rank": r, "word": w} for r, w in added[:samples]],
+        "column_changes": {c: column_changes[c] for c in COMPARED_COLUMNS if column_changes[c]},
+        "column_samples": {c: v for c, v in column_samples.items() if v},
+        "level_tags_added": dict(tags_added.most_common()),
+        "level_tags_removed": dict(tags_removed.most_common()),
+        "regression_count": len(regressions),
+        "regressions": regressions[: max(samples, 50)],
+        "warnings": warnings,
+    }
+
+
+def _md_cell(value: object, width: int = 60) -> str:
+    s = str(value).replace("|", "\\|").replace("\n", " ")
+    return s if len(s) <= width else s[: width - 1] + "…"
+
+
+def format_markdown(report: Dict[str, object]) -> str:
+    lines = [
+        "# CSV diff",
+        "",
+        f"- rows: old {report['old_rows']}, new {report['new_rows']}, matched {report['matched_rows']}",
+        f"- removed: {report['removed_rows']}, added: {report['added_rows']}",
+        f"- regressions (empty phonetic / meaning): {report['regression_count']}",
+        "",
+        "## Column changes",
+        "",
+        "| column | changed rows |",
+        "| --- | --- |",
+    ]
+    warnings: List[str] = report["warnings"]  # type: ignore[assignment]
+    if warnings:
+        lines[5:5] = [f"- **WARNING**: {w}" for w in warnings]
+    column_changes: Dict[str, int] = report["column_changes"]  # type: ignore[assignment]
+    for col, n in column_changes.items():
+        lines.append(f"| {col} | {n} |")
+    if not column_changes:
+        lines.append("| (none) | 0 |")
+
+    for title, key in (("Level tags added", "level_tags_added"), ("Level tags removed", "level_tags_removed")):
+        tags: Dict[str, int] = report[key]  # type: ignore[assignment]
+        if tags:
+            lines += ["", f"## {title}", ""]
+            lines += [f"- {tag}: {n}" for tag, n in tags.items()]
+
+    regressions: List[Dict[str, object]] = report["regressions"]  # type: ignore[assignment]
+    if regressions:
+        lines += ["", "## Regressions", "", "| rank | word | column | old |", "| --- | --- | --- | --- |"]
+        for r in regressions:
+            lines.append(f"| {r['rank']} | {_md_cell(r['word'])} | {r['column']} | {_md_cell(r['old'])} |")
+
+    samples: Dict[str, List[Dict[str, object]]] = report["column_samples"]  # type: ignore[assignment]
+    if samples:
+        lines += ["", "## Samples"]
+        for col, rows in samples.items():
+            lines += ["", f"### {col}", "", "| rank | word | old | new |", "| --- | --- | --- | --- |"]
+            for r in rows:
+                lines.append(f"| {r['rank']} | {_md_cell(r['word'])} | {_md_cell(r['old'])} | {_md_cell(r['new'])} |")
+
+    for title, key in (("Removed rows", "removed_samples"), ("Added rows", "added_samples")):
+        rows: List[Dict[str, object]] = report[key]  # type: ignore[assignment]
+        if rows:
+            lines += ["", f"## {title} (sample)", ""]
+            lines += [f"- {r['rank']} {r['word']}" for r in rows]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="比较两代转换结果 CSV（按 (rank, word) 关联），报告列变化与回退")
+    p.add_argument("old", type=Path, help="旧版 CSV 文件或 COCA*.csv 所在目录")
+    p.add_argument("new", type=Path, help="新版 CSV 文件或 COCA*.csv 所在目录")
+    p.add_argument("--format", choices=["markdown", "json"], default="markdown", help="报告格式（默认：markdown）")
+    p.add_argument("--samples", type=int, default=5, help="每列展示的示例行数（默认：5）")
+    p.add_argument("-o", "--output", type=Path, default=None, help="报告输出路径（默认：标准输出）")
+    p.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="若 phonetic/meaning/full_meaning 变为空、新增行缺少音标/释义，或两边几乎无法对齐，则以状态码 1 退出",
+    )
+    args = p.parse_args()
+
+    report = diff_rows(resolve_csvs(args.old), resolve_csvs(args.new), samples=args.samples)
+    if args.format == "json":
+        text = json.dumps(report, ensure_ascii=False, indent=2) + "\n"
+    else:
+        text = format_markdown(report)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+
+    for w in report["warnings"]:  # type: ignore[attr-defined]
+        print(f"警告: {w}", file=sys.stderr)
+    if args.fail_on_regression and (report["regression_count"] or report["warnings"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
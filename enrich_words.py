@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Annotate arbitrary word lists with COCA rank, level, phonetic and meanings.
+
+Inputs are one-word-per-line files (the *__仅单词.txt shape; blank lines and
+'#' comments are skipped, same as load_word_set). One hash index
+word(lower) -> CSV row is built over all generated COCA CSVs, then every input
+word is looked up and written out in input order. Words not found are kept
+(with empty columns) and listed in a miss report.
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from compress_io import open_text
+from word_basic_to_csv import find_converted_csvs, iter_converted_rows, iter_word_list
+
+INDEX_COLUMNS = ["rank", "level", "phonetic", "meaning", "full_meaning"]
+OUTPUT_COLUMNS = ["source", "word"] + INDEX_COLUMNS
+
+# word(lower) -> (rank, level, phonetic, meaning, full_meaning)
+WordIndex = Dict[str, Tuple[str, ...]]
+
+
+def build_word_index(csv_paths: Iterable[Path]) -> WordIndex:
+    """
+    Build word(lower) -> row values (INDEX_COLUMNS order) over generated CSVs.
+    CSVs are read in rank order, so a repeated word keeps its first (best-ranked) row.
+    """
+    index: WordIndex = {}
+    for row in iter_converted_rows(csv_paths):
+        key = (row.get("word") or "").strip().lower()
+        if key and key not in index:
+            index[key] = tuple((row.get(c) or "") for c in INDEX_COLUMNS)
+    return index
+
+
+def enrich(
+    inputs: Sequence[Path],
+    index: WordIndex,
+    *,
+    encoding: str = "utf-8",
+) -> Iterable[Tuple[List[str], bool]]:
+    """
+    Yield (output row, hit) for every word of every input, in input order.
+    Output row columns follow OUTPUT_COLUMNS.
+    """
+    empty = ("",) * len(INDEX_COLUMNS)
+    for path in inputs:
+        for word in iter_word_list(path, encoding=encoding):
+            values = index.get(word.lower())
+            yield [path.name, word, *(values or empty)], values is not None
+
+
+def enrich_files(
+    inputs: Sequence[Path],
+    output_path: Path,
+    index: WordIndex,
+    *,
+    encoding: str = "utf-8",
+    output_encoding: str = "utf-8",
+    misses_path: Optional[Path] = None,
+) -> Tuple[int, List[Tuple[str, str]]]:
+    """
+    Write the enriched CSV (and optionally a miss report, one "source<TAB>word" per line).
+    Returns (rows written, [(source, word), ...] of misses).
+    """
+    count = 0
+    misses: List[Tuple[str, str]] = []
+    with open_text(output_path, "w", newline="", encoding=output_encoding) as out:
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_COLUMNS)
+        for row, hit in enrich(inputs, index, encoding=encoding):
+            writer.writerow(row)
+            count += 1
+            if not hit:
+                misses.append((row[0], row[1]))
+
+    if misses_path is not None:
+        with open_text(misses_path, "w", encoding="utf-8", newline="\n") as f:
+            for source, word in misses:
+                f.write(f"{source}\t{word}\n")
+    return count, misses
+
+
+def default_output_path(input_path: Path) -> Path:
+    return input_path.with_name(f"{input_path.stem}__enriched.csv")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="给单词表（每行一个单词）补充 COCA 排名、级别、音标和释义")
+    p.add_argument("inputs", type=Path, nargs="+", help="输入单词表，可多个（如：考研词汇5500__仅单词.txt）")
+    p.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="输出 CSV 路径（默认：第一个输入文件名 + __enriched.csv）",
+    )
+    p.add_argument(
+        "--csv-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="COCA*.csv 所在目录（默认：脚本所在目录）",
+    )
+    p.add_argument("--misses", type=Path, default=None, help="未命中单词报告路径（每行：来源<TAB>单词）")
+    p.add_argument("--encoding", default="utf-8", help="输入文件编码（默认：utf-8）")
+    p.add_argument(
+        "--output-encoding",
+        default="utf-8",
+        help='输出文件编码（默认：utf-8；Excel 友好可用 "utf-8-sig"）',
+    )
+    args = p.parse_args()
+
+    csv_paths = find_converted_csvs(args.csv_dir)
+    if not csv_paths:
+        raise FileNotFoundError(f"未找到 COCA CSV 文件: {args.csv_dir}")
+    index = build_word_index(csv_paths)
+
+    output_path: Path = args.output or default_output_path(args.inputs[0])
+    n, misses = enrich_files(
+        args.inputs,
+        output_path,
+        index,
+        encoding=args.encoding,
+        output_encoding=args.output_encoding,
+        misses_path=args.misses,
+    )
+    print(f"已输出 {n} 行 -> {output_path}（未命中 {len(misses)} 个）")
+    if misses and args.misses is None:
+        preview = "、".join(w for _, w in misses[:20])
+        print(f"未命中示例: {preview}{' ...' if len(misses) > 20 else ''}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
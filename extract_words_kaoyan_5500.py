@@ -16,6 +16,8 @@ import re
 from pathlib import Path
 from typing import Iterable, Iterator, Optional
 
+from compress_io import open_text, strip_compression_suffix
+
 
 WORD_RE = re.compile(r"^[A-Za-z][A-Za-z'\-]*$")
 RECITE_RE = re.compile(r"^RECITE\s+([A-Za-z][A-Za-z'\-]*)\b")
@@ -97,12 +99,21 @@ def write_words(
     output_encoding: str = "utf-8",
     dedupe: bool = True,
     to_lower: bool = False,
+    compresslevel: Optional[int] = None,
+    compress_threads: int = 1,
 ) -> int:
     seen = set()
     count = 0
 
-    with input_path.open("r", encoding=input_encoding, errors="replace") as f:
-        with output_path.open("w", encoding=output_encoding, newline="\n") as out:
+    with open_text(input_path, "r", encoding=input_encoding, errors="replace") as f:
+        with open_text(
+            output_path,
+            "w",
+            encoding=output_encoding,
+            newline="\n",
+            compresslevel=compresslevel,
+            threads=compress_threads,
+        ) as out:
             for w in iter_words(f):
                 if to_lower:
                     w = w.lower()
@@ -118,18 +129,20 @@ def write_words(
 
 
 def default_output_path(input_path: Path) -> Path:
+    # 压缩输入（如 xxx.txt.gz）先去掉压缩后缀再取文件名
+    input_path = strip_compression_suffix(input_path)
     return input_path.with_name(f"{input_path.stem}__仅单词.txt")
 
 
 def main() -> None:
     p = argparse.ArgumentParser(description="从考研词汇5500（RECITE/DICTATION/SPELLING 格式）提取仅单词列表")
-    p.add_argument("input", type=Path, help="输入 TXT 文件路径（如：考研词汇5500.txt）")
+    p.add_argument("input", type=Path, help="输入 TXT 文件路径（如：考研词汇5500.txt；支持 .gz/.xz/.bz2 压缩文件）")
     p.add_argument(
         "-o",
         "--output",
         type=Path,
         default=None,
-        help="输出 TXT 文件路径（默认：输入文件名 + __仅单词.txt）",
+        help="输出 TXT 文件路径（默认：输入文件名 + __仅单词.txt；以 .gz/.xz/.bz2 结尾则压缩输出）",
     )
     p.add_argument("--encoding", default="utf-8", help="输入文件编码（默认：utf-8）")
     p.add_argument(
@@ -143,6 +156,18 @@ def main() -> None:
         help="不去重（默认：去重并保序；去重时按小写比较）",
     )
     p.add_argument("--lower", action="store_true", help="输出统一转小写")
+    p.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        help="输出为 .gz/.xz/.bz2 时的压缩级别（默认：gz/xz 为 6，bz2 为 9）",
+    )
+    p.add_argument(
+        "--compress-threads",
+        type=int,
+        default=1,
+        help="压缩线程数；>1 时若系统有 pigz / xz / pbzip2 则用其多线程压缩（默认：1）",
+    )
     args = p.parse_args()
 
     output_path: Path = args.output or default_output_path(args.input)
@@ -153,6 +178,8 @@ def main() -> None:
         output_encoding=args.output_encoding,
         dedupe=(not args.keep_duplicates),
         to_lower=args.lower,
+        compresslevel=args.compress_level,
+        compress_threads=args.compress_threads,
     )
     print(f"已输出 {n} 行单词 -> {output_path}")
 
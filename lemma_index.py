@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Offline inflection -> lemma table for label matching.
+
+Label lists (*__仅单词.txt) hold lemmas ("abandon", "study"), while COCA
+headwords are often inflected ("abandoned", "studies"). Instead of applying
+suffix rules per row, this module generates, once, every regular inflection of
+every word in the label vocabulary, plus the irregular forms listed in
+lemma_exceptions.txt, into a variant -> lemma dict. The table is cached on disk
+(pickle) and only rebuilt when the vocabulary or the exceptions file changes.
+
+Regular rules (forward generation from the lemma):
+- plural / 3rd person:  +s, +es after s/x/z/ch/sh/o, consonant+y -> ies, f/fe -> ves
+- past / past participle: +ed, e -> +d, consonant+y -> ied, CVC -> also double consonant
+- present participle:   +ing, drop silent e, ie -> ying, CVC -> also double consonant
+
+CVC lemmas get both forms (open -> opened, stop -> stopped); the wrong one
+(openned, stoped) is a non-word and never matches.
+
+Regular -er/-est comparatives are not generated: on COCA headwords "-er" mostly
+yields derived nouns (timer, pointer), not inflections. Irregular comparatives
+(better, worse, ...) are in the exceptions file.
+
+A generated variant that is itself a word of the vocabulary is left out, so
+real headwords ("wound", "found") keep their own labels only. A variant that
+two lemmas generate goes to the longer one when they differ only by a final
+"e" ("uses" -> "use", not "us") or a doubled consonant ("hissed" -> "hiss",
+not "his"); any other ambiguous variant is left out.
+"""
+
+import argparse
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from compress_io import open_text
+
+EXCEPTIONS_FILE = Path(__file__).resolve().parent / "lemma_exceptions.txt"
+CACHE_FILE = Path(__file__).resolve().parent / ".lemma_table.pickle"
+TABLE_VERSION = 4
+
+VOWELS = frozenset("aeiou")
+SIBILANT_ENDINGS = ("s", "x", "z", "ch", "sh")
+
+
+def _is_cvc(word: str) -> bool:
+    """Short consonant-vowel-consonant ending whose last consonant doubles: stop -> stopped."""
+    if len(word) < 3 or len(word) > 5:
+        return False
+    a, b, c = word[-3], word[-2], word[-1]
+    return a not in VOWELS and b in VOWELS and c not in VOWELS and c not in "wxy"
+
+
+def regular_inflections(word: str) -> Iterator[str]:
+    """
+    Yield regular inflected forms of a lowercase lemma (may include non-words, which never match).
+    Example: list(regular_inflections("study")) -> ["studies", "studied", "studying"]
+    """
+    # -s / -es
+    if word.endswith(SIBILANT_ENDINGS):
+        yield word + "es"
+    elif word.endswith("y") and len(word) > 1 and word[-2] not in VOWELS:
+        yield word[:-1] + "ies"
+    else:
+        yield word + "s"
+        if word.endswith("o"):
+            yield word + "es"
+        if word.endswith("fe"):
+            yield word[:-2] + "ves"
+        elif word.endswith("f"):
+            yield word[:-1] + "ves"
+
+    # -ed
+    if word.endswith("e"):
+        yield word + "d"
+    elif word.endswith("y") and len(word) > 1 and word[-2] not in VOWELS:
+        yield word[:-1] + "ied"
+    else:
+        yield word + "ed"
+        if _is_cvc(word):
+            yield word + word[-1] + "ed"
+
+    # -ing
+    if word.endswith("ie"):
+        yield word[:-2] + "ying"
+    elif word.endswith("e") and not word.endswith(("ee", "ye", "oe")) and len(word) > 2:
+        yield word[:-1] + "ing"
+    else:
+        yield word + "ing"
+        if _is_cvc(word):
+            yield word + word[-1] + "ing"
+
+
+def load_exceptions(path: Path = EXCEPTIONS_FILE, *, encoding: str = "utf-8") -> Dict[str, str]:
+    """
+    Load irregular forms: one "lemma form1 form2 ..." group per line.
+    Blank lines and lines starting with '#' are ignored.
+    Returns: form -> lemma
+    """
+    out: Dict[str, str] = {}
+    if not path.exists():
+        return out
+    with open_text(path, "r", encoding=encoding, errors="replace") as fh:
+        for raw in fh:
+            s = raw.strip()
+            if not s or s.startswith("#"):
+                continue
+            lemma, *forms = s.lower().split()
+            for form in forms:
+                out.setdefault(form, lemma)
+    return out
+
+
+def build_lemma_table(vocabulary: Iterable[str], exceptions: Dict[str, str]) -> Dict[str, str]:
+    """
+    Build variant -> lemma for every word of the vocabulary.
+    Irregular forms win over regular ones. A regular form generated by several
+    lemmas maps to L + "e" or L + L[-1] when the candidates are L and that
+    longer lemma, and is dropped otherwise.
+    """
+    vocab: Set[str] = {w.lower() for w in vocabulary if w}
+    table: Dict[str, str] = {}
+    for form, lemma in exceptions.items():
+        if lemma in vocab and form not in vocab:
+            table[form] = lemma
+
+    candidates: Dict[str, Set[str]] = {}
+    for lemma in vocab:
+        if not lemma.isalpha() or len(lemma) < 2:
+            continue
+        for form in regular_inflections(lemma):
+            if form not in vocab and form not in table:
+                candidates.setdefault(form, set()).add(lemma)
+    for form, lemmas in candidates.items():
+        if len(lemmas) > 1:
+            lemmas = {lemma for lemma in lemmas if lemma + "e" not in lemmas and lemma + lemma[-1] not in lemmas}
+        if len(lemmas) == 1:
+            table[form] = lemmas.pop()
+    return table
+
+
+def _signature(vocabulary: Set[str], exceptions_path: Path) -> str:
+    h = hashlib.sha1()
+    h.update(f"v{TABLE_VERSION}\n".encode("utf-8"))
+    for w in sorted(vocabulary):
+        h.update(w.encode("utf-8") + b"\n")
+    if exceptions_path.exists():
+        h.update(exceptions_path.read_bytes())
+    return h.hexdigest()
+
+
+def load_lemma_table(
+    vocabulary: Iterable[str],
+    *,
+    exceptions_path: Path = EXCEPTIONS_FILE,
+    cache_path: Optional[Path] = CACHE_FILE,
+) -> Dict[str, str]:
+    """
+    Return the variant -> lemma table for a vocabulary, from the on-disk cache
+    when it was built from the same vocabulary and exceptions file.
+    """
+    vocab = {w.lower() for w in vocabulary if w}
+    signature = _signature(vocab, exceptions_path)
+    if cache_path is not None and cache_path.exists():
+        try:
+            with cache_path.open("rb") as f:
+                cached = pickle.load(f)
+            if cached.get("signature") == signature:
+                return cached["table"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    table = build_lemma_table(vocab, load_exceptions(exceptions_path))
+    if cache_path is not None:
+        try:
+            with cache_path.open("wb") as f:
+                pickle.dump({"signature": signature, "table": table}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # read-only directory: the in-memory table still works
+    return table
+
+
+def main() -> None:
+    from word_basic_to_csv import build_label_sets
+
+    p = argparse.ArgumentParser(description="预先生成词形变化 -> 原形 对照表（供 word_basic_to_csv.py --lemmatize 使用）")
+    p.add_argument(
+        "--auto-labels-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="*__仅单词.txt 所在目录（默认：脚本所在目录）",
+    )
+    p.add_argument(
+        "--label",
+        action="append",
+        default=[],
+        help="额外的标签词表，如 --label 小学=广州小学英语__仅单词.txt",
+    )
+    p.add_argument("--exceptions", type=Path, default=EXCEPTIONS_FILE, help="不规则变化表（默认：lemma_exceptions.txt）")
+    p.add_argument("--cache", type=Path, default=CACHE_FILE, help="缓存文件路径（默认：.lemma_table.pickle）")
+    p.add_argument("--lookup", nargs="*", default=[], help="查询若干词形对应的原形")
+    args = p.parse_args()
+
+    label_sets = build_label_sets(args.label, auto_labels_dir=args.auto_labels_dir, auto_labels=True)
+    vocabulary: Set[str] = set()
+    for _, words in label_sets:
+        vocabulary |= words
+    table = load_lemma_table(vocabulary, exceptions_path=args.exceptions, cache_path=args.cache)
+    print(f"词表 {len(vocabulary)} 个原形 -> {len(table)} 个词形 ({args.cache})")
+    for w in args.lookup:
+        print(f"  {w} -> {table.get(w.lower(), '(无)')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Load test for lookup_server.py (stdlib asyncio only).
+
+Opens --connections keep-alive connections and sends a mix of single-word,
+batch (--batch-size words) and rank-range requests for --duration seconds,
+optionally paced to a target --rate (requests/second across all connections).
+Reports throughput and p50/p90/p99/max latency. When paced, latency is measured
+from each request's scheduled send time, so a stalled server also charges the
+requests queued behind it (no coordinated omission).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import quote
+
+from word_basic_to_csv import find_converted_csvs, iter_converted_rows
+
+# every request is well-formed and small, so these mean the server misbehaved (as does any 5xx)
+ERROR_STATUSES = {400, 405, 413, 414, 431}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[i]
+
+
+def build_requests(words: List[str], max_rank: int, *, batch_size: int, count: int, seed: int) -> List[bytes]:
+    """Pre-build raw HTTP requests: 70% single word, 20% batch POST, 10% rank range."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(count):
+        r = rnd.random()
+        if r < 0.7:
+            w = quote(rnd.choice(words))
+            out.append(f"GET /word/{w} HTTP/1.1\r\nHost: x\r\n\r\n".encode("ascii"))
+        elif r < 0.9:
+            body = json.dumps(rnd.sample(words, min(batch_size, len(words)))).encode("utf-8")
+            head = f"POST /words HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n"
+            out.append(head.encode("ascii") + body)
+        else:
+            start = rnd.randint(1, max(1, max_rank - 100))
+            out.append(f"GET /ranks?from={start}&to={start + 99} HTTP/1.1\r\nHost: x\r\n\r\n".encode("ascii"))
+    return out
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(
+    host: str,
+    port: int,
+    requests: List[bytes],
+    offset: int,
+    deadline: float,
+    interval: Optional[float],
+    latencies: List[float],
+    errors: List[int],
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    next_at = time.perf_counter()
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            if interval:
+                delay = next_at - t0
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                t0 = next_at
+                next_at += interval
+            req = requests[i % len(requests)]
+            i += 1
+            writer.write(req)
+            await writer.drain()
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - t0)
+            if status >= 500 or status in ERROR_STATUSES:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(
+    host: str,
+    port: int,
+    requests: List[bytes],
+    *,
+    connections: int,
+    duration: float,
+    rate: Optional[float],
+) -> None:
+    latencies: List[float] = []
+    errors: List[int] = []
+    interval = connections / rate if rate else None
+    step = max(1, len(requests) // connections)
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(
+        *(
+            _worker(host, port, requests, n * step, deadline, interval, latencies, errors)
+            for n in range(connections)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    lat = sorted(x * 1000 for x in latencies)
+    print(f"requests: {len(lat)}  errors: {len(errors)}  elapsed: {elapsed:.2f}s  rate: {len(lat) / elapsed:.0f} req/s")
+    print(
+        f"latency ms  p50: {percentile(lat, 50):.2f}  p90: {percentile(lat, 90):.2f}  "
+        f"p99: {percentile(lat, 99):.2f}  max: {lat[-1] if lat else 0:.2f}"
+    )
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Load-test lookup_server.py and report p50/p99 latency.")
+    p.add_argument("--host", default="127.0.0.1", help="server address (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8765, help="server port (default: 8765)")
+    p.add_argument(
+        "--csv-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="directory with the generated COCA*.csv files, used to pick query words",
+    )
+    p.add_argument("--connections", type=int, default=32, help="concurrent keep-alive connections (default: 32)")
+    p.add_argument("--duration", type=float, default=10.0, help="test duration in seconds (default: 10)")
+    p.add_argument("--rate", type=float, default=None, help="target total requests/second (default: as fast as possible)")
+    p.add_argument("--batch-size", type=int, default=200, help="words per batch request (default: 200)")
+    p.add_argument("--seed", type=int, default=1, help="random seed for the request mix (default: 1)")
+    args = p.parse_args()
+
+    words = []
+    max_rank = 1
+    for row in iter_converted_rows(find_converted_csvs(args.csv_dir)):
+        if row.get("word"):
+            words.append(row["word"])
+        try:
+            max_rank = max(max_rank, int(row.get("rank") or 0))
+        except ValueError:
+            pass
+    if not words:
+        raise FileNotFoundError(f"未找到 COCA CSV 文件: {args.csv_dir}")
+
+    requests = build_requests(words, max_rank, batch_size=args.batch_size, count=20000, seed=args.seed)
+    asyncio.run(
+        run(
+            args.host,
+            args.port,
+            requests,
+            connections=args.connections,
+            duration=args.duration,
+            rate=args.rate,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Local word-lookup HTTP service over the generated COCA CSVs (stdlib asyncio only).
+
+The CSVs (rank, level, word, phonetic, meaning, full_meaning, ...) are loaded
+once into a word index and a rank-sorted list; each row is serialised to JSON
+at load time, so responses are assembled from ready-made bytes. A background task watches the
+CSV files and reloads them when one is added, removed or modified (size/mtime).
+
+Endpoints (all return JSON):
+- GET  /word/<word>              one word (404 if unknown)
+- GET  /words?w=a,b,c            batch lookup
+- POST /words                    batch lookup, body: ["a", "b"] or {"words": [...]}
+- GET  /rank/<n>                 one rank
+- GET  /ranks?from=A&to=B        rank range (inclusive, at most --max-range rows)
+- GET  /health                   row count and load time
+
+Serialised responses are kept in an LRU keyed by request (POST batches by their
+normalised word list), bounded by entry count and by bytes, cleared on reload.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from word_basic_to_csv import find_converted_csvs, iter_converted_rows
+
+ROW_FIELDS = ["rank", "level", "word", "phonetic", "meaning", "full_meaning"]
+MAX_BODY = 1 << 20
+# per-entry bookkeeping on top of key + payload bytes, for the cache byte budget
+CACHE_ENTRY_OVERHEAD = 200
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    414: "URI Too Long",
+    431: "Request Header Fields Too Large",
+}
+
+
+class WordStore:
+    """In-memory index over the generated CSVs, rebuilt whenever the files change."""
+
+    def __init__(self, csv_dir: Path) -> None:
+        self.csv_dir = csv_dir
+        # pre-serialised row JSON
+        self.by_word: Dict[str, bytes] = {}
+        self.ranks: List[int] = []
+        self.rows_by_rank: List[bytes] = []
+        self.signature: List[Tuple[str, int, int]] = []
+        self.loaded_at = 0.0
+
+    def current_signature(self) -> List[Tuple[str, int, int]]:
+        out = []
+        for p in find_converted_csvs(self.csv_dir):
+            st = p.stat()
+            out.append((p.name, st.st_size, st.st_mtime_ns))
+        return out
+
+    def load(self) -> None:
+        signature = self.current_signature()
+        by_word: Dict[str, bytes] = {}
+        by_rank: Dict[int, bytes] = {}
+        for raw in iter_converted_rows(self.csv_dir / name for name, _, _ in signature):
+            try:
+                rank = int((raw.get("rank") or "").strip())
+            except ValueError:
+                continue
+            row: Dict[str, object] = {f: (raw.get(f) or "") for f in ROW_FIELDS}
+            row["rank"] = rank
+            encoded = _json(row)
+            key = str(row["word"]).lower()
+            if key:
+                by_word.setdefault(key, encoded)
+            by_rank.setdefault(rank, encoded)
+
+        ranks = sorted(by_rank)
+        # build everything first, then swap, so requests never see a half-built index
+        self.by_word, self.ranks, self.rows_by_rank = by_word, ranks, [by_rank[r] for r in ranks]
+        self.signature = signature
+        self.loaded_at = time.time()
+
+    def changed(self) -> bool:
+        return self.current_signature() != self.signature
+
+    def word(self, word: str) -> Optional[bytes]:
+        return self.by_word.get(word.strip().lower())
+
+    def rank_range(self, start: int, end: int) -> List[bytes]:
+        lo = bisect.bisect_left(self.ranks, start)
+        hi = bisect.bisect_right(self.ranks, end)
+        return self.rows_by_rank[lo:hi]
+
+
+class LRUCache:
+    """
+    Mapping of request key -> serialised response, bounded by entry count and
+    by total bytes (keys + payloads); least recently used evicted first.
+    Entries over 1/16 of the byte budget are not cached at all.
+    """
+
+    def __init__(self, maxsize: int, maxbytes: int = 64 << 20) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.data: "OrderedDict[Tuple[str, str, bytes], Tuple[int, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _size(key: Tuple[str, str, bytes], value: Tuple[int, bytes]) -> int:
+        return len(key[1]) + len(key[2]) + len(value[1]) + CACHE_ENTRY_OVERHEAD
+
+    def get(self, key: Tuple[str, str, bytes]) -> Optional[Tuple[int, bytes]]:
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.data.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple[str, str, bytes], value: Tuple[int, bytes]) -> None:
+        size = self._size(key, value)
+        if self.maxsize <= 0 or size > self.maxbytes // 16:
+            return  # one huge response would flush most of the cache
+        old = self.data.pop(key, None)
+        if old is not None:
+            self.nbytes -= self._size(key, old)
+        self.data[key] = value
+        self.nbytes += size
+        while len(self.data) > self.maxsize or self.nbytes > self.maxbytes:
+            old_key, old_value = self.data.popitem(last=False)
+            self.nbytes -= self._size(old_key, old_value)
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.nbytes = 0
+
+
+def _json(obj: object) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _normalise_words(words: List[str]) -> List[str]:
+    """Stripped, non-empty, first occurrence only, in request order."""
+    out = []
+    seen = set()
+    for w in words:
+        w = w.strip()
+        if w and w not in seen:
+            seen.add(w)
+            out.append(w)
+    return out
+
+
+def _parse_words_body(body: bytes) -> Optional[List[str]]:
+    """Words of a POST /words body (["a", ...] or {"words": [...]}), None if malformed."""
+    try:
+        data = json.loads(body or b"[]")
+    except ValueError:
+        return None
+    words = data.get("words", []) if isinstance(data, dict) else data
+    if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+        return None
+    return words
+
+
+def _batch(store: WordStore, words: List[str]) -> bytes:
+    """{"results": {word: row, ...}, "missing": [word, ...]}, built from the pre-serialised rows."""
+    results = []
+    missing = []
+    for w in _normalise_words(words):
+        row = store.word(w)
+        if row is None:
+            missing.append(w)
+        else:
+            results.append(_json(w) + b":" + row)
+    return b'{"results":{' + b",".join(results) + b'},"missing":' + _json(missing) + b"}"
+
+
+class LookupApp:
+    def __init__(
+        self,
+        store: WordStore,
+        *,
+        cache_size: int = 4096,
+        cache_bytes: int = 64 << 20,
+        max_range: int = 1000,
+    ) -> None:
+        self.store = store
+        self.cache = LRUCache(cache_size, cache_bytes)
+        self.max_range = max_range
+
+    def handle(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        key_body = body
+        if method == "POST" and body:
+            # key batches by what they look up, not by the raw (up to MAX_BODY) body
+            words = _parse_words_body(body)
+            if words is None:
+                return self.route(method, target, body)
+            key_body = "\n".join(_normalise_words(words)).encode("utf-8")
+        key = (method, target, key_body)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        response = self.route(method, target, body)
+        status = response[0]
+        if status in (200, 404) and not target.startswith("/health"):
+            self.cache.put(key, response)
+        return response
+
+    def route(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        url = urlsplit(target)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        store = self.store
+
+        if path.startswith("/word/") and method == "GET":
+            row = store.word(path[len("/word/"):])
+            return (200, row) if row is not None else (404, _json({"error": "not found"}))
+
+        if path == "/words":
+            if method == "GET":
+                words = [w for v in query.get("w", []) for w in v.split(",")]
+            elif method == "POST":
+                parsed = _parse_words_body(body)
+                if parsed is None:
+                    return 400, _json({"error": 'body must be JSON ["word", ...] or {"words": [...]}'})
+                words = parsed
+            else:
+                return 405, _json({"error": "method not allowed"})
+            return 200, _batch(store, words)
+
+        if method != "GET":
+            return 405, _json({"error": "method not allowed"})
+
+        if path.startswith("/rank/"):
+            try:
+                n = int(path[len("/rank/"):])
+            except ValueError:
+                return 400, _json({"error": "rank must be an integer"})
+            rows = store.rank_range(n, n)
+            return (200, rows[0]) if rows else (404, _json({"error": "not found"}))
+
+        if path == "/ranks":
+            try:
+                start = int(query.get("from", ["1"])[0])
+                end = int(query.get("to", [str(start + self.max_range - 1)])[0])
+            except ValueError:
+                return 400, _json({"error": "from/to must be integers"})
+            if end < start or end - start + 1 > self.max_range:
+                return 400, _json({"error": f"range must be non-empty and at most {self.max_range} ranks"})
+            return 200, b'{"results":[' + b",".join(store.rank_range(start, end)) + b"]}"
+
+        if path == "/health":
+            return 200, _json(
+                {
+                    "rows": len(store.rows_by_rank),
+                    "words": len(store.by_word),
+                    "files": len(store.signature),
+                    "loaded_at": store.loaded_at,
+                    "cache": {"size": len(self.cache.data), "bytes": self.cache.nbytes, "hits": self.cache.hits, "misses": self.cache.misses},
+                }
+            )
+
+        return 404, _json({"error": "not found"})
+
+    async def watch(self, interval: float) -> None:
+        """Poll the CSV files and reload (off the event loop) when they change."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await loop.run_in_executor(None, self.store.changed):
+                    await loop.run_in_executor(None, self.store.load)
+                    self.cache.clear()
+                    print(f"已重新加载 {len(self.store.rows_by_rank)} 行")
+            except OSError as exc:  # a file replaced mid-read: try again next round
+                print(f"重新加载失败: {exc}")
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except ValueError:  # longer than the StreamReader limit (64 KiB)
+                    await self._send(writer, 414, _json({"error": "request line too long"}), keep_alive=False)
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, 400, _json({"error": "bad request line"}), keep_alive=False)
+                    break
+
+                headers: Dict[str, str] = {}
+                try:
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                except ValueError:
+                    await self._send(writer, 431, _json({"error": "header line too long"}), keep_alive=False)
+                    break
+
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._send(writer, 400, _json({"error": "invalid Content-Length"}), keep_alive=False)
+                    break
+                if length > MAX_BODY:
+                    await self._send(writer, 413, _json({"error": "body too large"}), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, payload = self.handle(method.upper(), target, body)
+                await self._send(writer, status, payload, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, payload: bytes, *, keep_alive: bool) -> None:
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+
+async def serve(
+    csv_dir: Path,
+    host: str,
+    port: int,
+    *,
+    cache_size: int = 4096,
+    cache_bytes: int = 64 << 20,
+    max_range: int = 1000,
+    reload_interval: float = 2.0,
+) -> None:
+    store = WordStore(csv_dir)
+    store.load()
+    if not store.rows_by_rank:
+        raise FileNotFoundError(f"未找到 COCA CSV 文件: {csv_dir}")
+    app = LookupApp(store, cache_size=cache_size, cache_bytes=cache_bytes, max_range=max_range)
+
+    server = await asyncio.start_server(app.serve_client, host, port)
+    watcher = asyncio.create_task(app.watch(reload_interval))
+    print(f"已加载 {len(store.rows_by_rank)} 行（{len(store.signature)} 个 CSV），监听 http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Serve word / rank lookups over the generated COCA CSVs.")
+    p.add_argument(
+        "--csv-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="directory with the generated COCA*.csv files (default: this script's directory)",
+    )
+    p.add_argument("--host", default="127.0.0.1", help="bind address (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8765, help="port (default: 8765)")
+    p.add_argument("--cache-size", type=int, default=4096, help="LRU response cache entries (default: 4096; 0 disables)")
+    p.add_argument("--cache-mb", type=int, default=64, help="LRU response cache size limit in MiB (default: 64)")
+    p.add_argument("--max-range", type=int, default=1000, help="max rows per /ranks request (default: 1000)")
+    p.add_argument("--reload-interval", type=float, default=2.0, help="seconds between CSV change checks (default: 2)")
+    args = p.parse_args()
+
+    try:
+        asyncio.run(
+            serve(
+                args.csv_dir,
+                args.host,
+                args.port,
+                cache_size=args.cache_size,
+                cache_bytes=args.cache_mb << 20,
+                max_range=args.max_range,
+                reload_interval=args.reload_interval,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Merge the COCA, 六级 and TOEFL dictionaries into one entry per word.
+
+Each source has its own parser:
+- COCA: the generated COCA*.csv chunks (rank, level, word, phonetic, meaning, ...)
+- 六级: 大学六级英语单词.txt ("word  英 [...] 美 [...]\\t... n.释义  (1) 例句 ... 1[N-COUNT ...]义项")
+- TOEFL: TOEFL词汇词根+联想记忆法：乱序版.txt ("Deck:...   word  [...]\\t... 释义 记　词根 搭　搭配 例　例句 派　派生")
+
+六级 and TOEFL are parsed in parallel worker processes into word(lower) -> entry
+tables (a few thousand words each); the COCA CSVs are then streamed and
+hash-joined against them row by row, so memory stays bounded by the two small
+tables. Words that only appear in 六级/TOEFL are written after the COCA words.
+The "sources" column records provenance: COCA rank, 六级/TOEFL line numbers.
+"""
+
+import argparse
+import csv
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from compress_io import open_text
+from word_basic_to_csv import find_converted_csvs, iter_converted_rows
+
+CET6_FILE = "大学六级英语单词.txt"
+TOEFL_FILE = "TOEFL词汇词根+联想记忆法：乱序版.txt"
+
+COCA_COLUMNS = ["coca_rank", "coca_level", "coca_phonetic", "coca_meaning"]
+CET6_COLUMNS = ["cet6_phonetic_uk", "cet6_phonetic_us", "cet6_meaning", "cet6_senses"]
+TOEFL_COLUMNS = ["toefl_phonetic", "toefl_meaning", "toefl_roots", "toefl_collocations", "toefl_derivatives"]
+OUTPUT_COLUMNS = ["word", "sources"] + COCA_COLUMNS + CET6_COLUMNS + TOEFL_COLUMNS
+
+CET6_HEAD_RE = re.compile(
+    r"^\s*([A-Za-z][A-Za-z'\-. ]*?)\s+英\s*(\[[^\]]*\])?\s*美\s*(\[[^\]]*\])?"
+)
+CET6_SENSE_RE = re.compile(r"(?<![\d(])(\d{1,2})\[([^\]]+)\]([^A-Za-z\[]+)")
+# multi-part entries glue the part number onto the first sense: "Part-11[N-COUNT ...]" = part 1, sense 1
+CET6_PART_RE = re.compile(r"Part-(\d)")
+TOEFL_HEAD_RE = re.compile(r"^(?:Deck:\S+)?\s*([A-Za-z][A-Za-z'\-. ]*?)\s+(\[[^\]]*\])")
+TOEFL_SECTION_RE = re.compile(r"\s*([记搭例派参])　")
+TOEFL_SECTIONS = {"记": "toefl_roots", "搭": "toefl_collocations", "派": "toefl_derivatives"}
+
+# word(lower) -> (line number, {column: value})
+SourceTable = Dict[str, Tuple[int, Dict[str, str]]]
+
+
+def _split_entry_line(raw: str) -> Tuple[str, str]:
+    parts = raw.rstrip("\n").split("\t", 1)
+    left = parts[0].strip().strip('"')
+    right = parts[1].strip().strip('"') if len(parts) > 1 else ""
+    return left, right
+
+
+def _iter_entry_lines(path: Path, encoding: str) -> Iterator[Tuple[int, str, str]]:
+    with open_text(path, "r", encoding=encoding, errors="replace") as fh:
+        for lineno, raw in enumerate(fh, 1):
+            if not raw.strip() or raw.lstrip().startswith("#"):
+                continue
+            left, right = _split_entry_line(raw)
+            yield lineno, left, right
+
+
+def parse_cet6_line(left: str, right: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Parse one 六级 entry into (word, {cet6_* columns}).
+    The short meaning is the text after the phonetics up to the example block;
+    numbered senses look like "1[N-COUNT 可数名词]缩写词；缩略形式".
+    """
+    head = CET6_HEAD_RE.match(left)
+    if not head:
+        return None
+    word = head.group(1).strip()
+    body = right
+    rhead = CET6_HEAD_RE.match(body)
+    if rhead:
+        body = body[rhead.end():]
+    meaning = re.split(r"\s{3,}|\(1\)", body.strip(), maxsplit=1)[0].strip()
+    sense_text = CET6_PART_RE.sub(r"Part-\1 ", body)
+    senses = [f"{n}[{tag.strip()}]{text.strip()}" for n, tag, text in CET6_SENSE_RE.findall(sense_text)]
+    return word, {
+        "cet6_phonetic_uk": head.group(2) or "",
+        "cet6_phonetic_us": head.group(3) or "",
+        "cet6_meaning": meaning,
+        "cet6_senses": " | ".join(senses),
+    }
+
+
+def parse_toefl_line(left: str, right: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Parse one TOEFL entry into (word, {toefl_* columns}).
+    Sections are introduced by a marker and an ideographic space: 记 (roots /
+    mnemonic), 搭 (collocations), 例 (example), 派 (derivatives), 参 (see also).
+    """
+    head = TOEFL_HEAD_RE.match(left)
+    if not head:
+        return None
+    word = head.group(1).strip()
+    body = right
+    rhead = TOEFL_HEAD_RE.match(body)
+    if rhead:
+        body = body[rhead.end():]
+
+    pieces = TOEFL_SECTION_RE.split(body)
+    out = {c: "" for c in TOEFL_COLUMNS}
+    out["toefl_phonetic"] = head.group(2)
+    out["toefl_meaning"] = pieces[0].strip()
+    for marker, text in zip(pieces[1::2], pieces[2::2]):
+        column = TOEFL_SECTIONS.get(marker)
+        if column and not out[column]:
+            out[column] = text.strip()
+    return word, out
+
+
+def load_source_table(path: Path, kind: str, encoding: str = "utf-8") -> SourceTable:
+    """
+    Parse a whole 六级 ("cet6") or TOEFL ("toefl") file into a word(lower) -> entry table.
+    The first entry of a repeated word wins.
+    """
+    parser = {"cet6": parse_cet6_line, "toefl": parse_toefl_line}[kind]
+    table: SourceTable = {}
+    for lineno, left, right in _iter_entry_lines(path, encoding):
+        parsed = parser(left, right)
+        if parsed is None:
+            continue
+        word, fields = parsed
+        table.setdefault(word.lower(), (lineno, dict(fields, word=word)))
+    return table
+
+
+def iter_merged_rows(
+    csv_paths: List[Path],
+    cet6: SourceTable,
+    toefl: SourceTable,
+) -> Iterator[List[str]]:
+    """
+    Stream COCA rows, joining 六级/TOEFL entries by lowercase word,
+    then yield the 六级/TOEFL-only words (六级 file order, then TOEFL file order).
+    """
+    seen = set()
+    for row in iter_converted_rows(csv_paths):
+        word = (row.get("word") or "").strip()
+        key = word.lower()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        coca = {
+            "coca_rank": row.get("rank") or "",
+            "coca_level": row.get("level") or "",
+            "coca_phonetic": row.get("phonetic") or "",
+            "coca_meaning": row.get("meaning") or "",
+        }
+        yield _merged_row(word, coca, cet6.get(key), toefl.get(key))
+
+    for table in (cet6, toefl):
+        for key, (_, fields) in table.items():
+            if key in seen:
+                continue
+            seen.add(key)
+            yield _merged_row(fields["word"], None, cet6.get(key), toefl.get(key))
+
+
+def _merged_row(
+    word: str,
+    coca: Optional[Dict[str, str]],
+    cet6: Optional[Tuple[int, Dict[str, str]]],
+    toefl: Optional[Tuple[int, Dict[str, str]]],
+) -> List[str]:
+    sources = []
+    values: Dict[str, str] = {}
+    if coca is not None:
+        sources.append(f"COCA:{coca['coca_rank']}")
+        values.update(coca)
+    if cet6 is not None:
+        sources.append(f"六级:{cet6[0]}")
+        values.update(cet6[1])
+    if toefl is not None:
+        sources.append(f"TOEFL:{toefl[0]}")
+        values.update(toefl[1])
+    values["word"] = word
+    values["sources"] = "|".join(sources)
+    return [values.get(c, "") for c in OUTPUT_COLUMNS]
+
+
+def merge_sources(
+    csv_paths: List[Path],
+    cet6_path: Optional[Path],
+    toefl_path: Optional[Path],
+    output_path: Path,
+    *,
+    encoding: str = "utf-8",
+    output_encoding: str = "utf-8",
+) -> int:
+    """
+    Write the consolidated CSV. Returns the number of words written.
+    """
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        cet6_future = pool.submit(load_source_table, cet6_path, "cet6", encoding) if cet6_path else None
+        toefl_future = pool.submit(load_source_table, toefl_path, "toefl", encoding) if toefl_path else None
+        cet6 = cet6_future.result() if cet6_future else {}
+        toefl = toefl_future.result() if toefl_future else {}
+
+    count = 0
+    with open_text(output_path, "w", newline="", encoding=output_encoding) as out:
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_COLUMNS)
+        for row in iter_merged_rows(csv_paths, cet6, toefl):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="按单词合并 COCA、六级、TOEFL 词库，每个单词输出一行（分来源列 + 出处）")
+    p.add_argument("output", type=Path, help="输出 CSV 路径")
+    p.add_argument(
+        "--csv-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="COCA*.csv 所在目录（默认：脚本所在目录）",
+    )
+    p.add_argument("--cet6", type=Path, default=None, help=f"六级词库 TXT（默认：CSV_DIR/{CET6_FILE}）")
+    p.add_argument("--toefl", type=Path, default=None, help=f"TOEFL 词库 TXT（默认：CSV_DIR/{TOEFL_FILE}）")
+    p.add_argument("--encoding", default="utf-8", help="输入文件编码（默认：utf-8）")
+    p.add_argument(
+        "--output-encoding",
+        default="utf-8",
+        help='输出文件编码（默认：utf-8；Excel 友好可用 "utf-8-sig"）',
+    )
+    args = p.parse_args()
+
+    csv_paths = find_converted_csvs(args.csv_dir)
+    cet6_path = args.cet6 or args.csv_dir / CET6_FILE
+    toefl_path = args.toefl or args.csv_dir / TOEFL_FILE
+    for src in (cet6_path, toefl_path):
+        if not src.exists():
+            raise FileNotFoundError(f"词库文件不存在: {src}")
+
+    n = merge_sources(
+        csv_paths,
+        cet6_path,
+        toefl_path,
+        args.output,
+        encoding=args.encoding,
+        output_encoding=args.output_encoding,
+    )
+    print(f"已合并 {n} 个单词 -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Sound-based search over the phonetic column: endings, rhymes, minimal pairs.
+
+The phonetic column mixes notations: modern US IPA ("/ˌpɜːrtərˈbeɪʃn/"),
+older British-style transcriptions ("/'neiʃən/"), alternatives ("/ðə; ði/"),
+and, in the 六级/初中 TXT sources, "英 [...] 美 [...]". normalize_phonetic()
+turns every form into canonical IPA token sequences so they compare equal:
+- ":" -> "ː", "ε"/"ɛ" -> "e", "g" -> "ɡ", old diphthongs ei/ai/əu/... -> eɪ/aɪ/oʊ/...
+- the "happy" vowel is "i" in both notations (old-style final "ɪ" -> "i")
+- non-prevocalic r is folded away (ər -> ə, ɑːr -> ɑː), so US and UK forms meet
+- ə between a consonant and n/l is dropped ("(ə)n", "ən" and "n" all -> n)
+- optional "(...)" segments, stress marks and syllable dots are removed
+  (the last primary stress is kept only to locate the rhyme)
+
+The index stores one key per (word, transcription): the reversed tokens joined
+by spaces, in a sorted list. Every word ending in /-ʃən/ is then one bisect
+range ("n ʃ ..."). Entries are numbered in COCA rank order, so ranking a range
+is sorting its entry ids. Rhymes use a second sorted list keyed on the tail from
+the stressed vowel, where equal tails are already in rank order; minimal pairs
+use a dict keyed by the token sequence with one position masked. The index is
+built from the COCA CSVs (plus the 英/美 TXT sources for words whose COCA
+phonetic is empty or missing) and cached as a pickle, rebuilt when any source
+file changes.
+"""
+
+import argparse
+import pickle
+import re
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from compress_io import open_text
+from merge_sources import CET6_FILE, CET6_HEAD_RE
+from word_basic_to_csv import find_converted_csvs, iter_converted_rows
+
+INDEX_CACHE_NAME = ".phonetic_index.pickle"
+INDEX_VERSION = 3
+BRACKET_PHONETIC_FILES = (CET6_FILE, "初中英语单词.txt")
+UNRANKED = 1 << 30
+MASK = "*"
+
+Tokens = Tuple[str, ...]
+# (rank, word, phonetic as written in the source)
+Match = Tuple[int, str, str]
+
+SLASH_RE = re.compile(r"/([^/]+)/")
+BRACKET_RE = re.compile(r"([英美])\s*\[([^\]]*)\]")
+VARIANT_SPLIT_RE = re.compile(r"\s*[;；]\s*|,\s+")
+OPTIONAL_RE = re.compile(r"\([^)]*\)")
+SPELLING_FOLD = str.maketrans({":": "ː", "ε": "e", "ɛ": "e", "g": "ɡ", "'": "ˈ", ",": "ˌ", "ɚ": "ər", "ɝ": "ɜːr"})
+DROPPED_CHARS = dict.fromkeys(map(ord, ". -̬̃"))
+
+# old / British spellings -> canonical token
+TOKEN_FOLD = {
+    "ei": "eɪ",
+    "ai": "aɪ",
+    "ɔi": "ɔɪ",
+    "au": "aʊ",
+    "əu": "oʊ",
+    "əʊ": "oʊ",
+    "ou": "oʊ",
+    "iə": "ɪə",
+    "uə": "ʊə",
+    "εə": "eə",
+    "əː": "ɜː",
+    "aː": "ɑː",
+    "ɑ": "ɑː",
+    "ɒ": "ɑː",
+    "a": "æ",
+    "o": "ɔ",
+    "ɜ": "ɜː",
+}
+# vowel + non-prevocalic r -> non-rhotic vowel (any other vowel just loses the r)
+R_FOLD = {"ɪ": "ɪə", "e": "eə", "ʊ": "ʊə"}
+VOWELS = frozenset(
+    ["iː", "ɪ", "i", "e", "æ", "ɑː", "ɔː", "ɔ", "ʊ", "uː", "u", "ʌ", "ɜː", "ə"]
+    + ["eɪ", "aɪ", "ɔɪ", "aʊ", "oʊ", "ɪə", "eə", "ʊə"]
+    + list(TOKEN_FOLD)
+)
+CONSONANTS = frozenset("p b t d k ɡ f v θ ð s z ʃ ʒ h m n ŋ l r j w x ʔ tʃ dʒ".split())
+# first char -> symbols starting with it, longest first; vowel + "ː" is handled by the tokenizer
+SYMBOLS: Dict[str, List[str]] = {}
+for _sym in sorted(VOWELS | CONSONANTS, key=len, reverse=True):
+    SYMBOLS.setdefault(_sym[0], []).append(_sym)
+STRESS_MARKS = frozenset("ˈˌ")
+
+
+def _tokenize(transcription: str) -> Optional[Tuple[Tokens, int]]:
+    """
+    Canonical tokens of one transcription and the index where its rhyme starts
+    (the first vowel after the last primary stress, else the last vowel).
+    Returns None for text that is not a (complete) transcription.
+    """
+    s = OPTIONAL_RE.sub("", transcription).translate(SPELLING_FOLD).strip()
+    if not s or s[0] == "-" or s[-1] == "-":
+        return None  # partial transcription such as "ˈɡlæs-"
+    s = s.translate(DROPPED_CHARS)
+
+    raw: List[str] = []
+    stressed = -1
+    i = 0
+    while i < len(s):
+        if s[i] in STRESS_MARKS:
+            if s[i] == "ˈ":
+                stressed = len(raw)
+            i += 1
+            continue
+        for sym in SYMBOLS.get(s[i], ()):
+            if s.startswith(sym, i):
+                break
+        else:
+            return None
+        i += len(sym)
+        if sym in VOWELS and s.startswith("ː", i):
+            sym += "ː"
+            i += 1
+        raw.append(TOKEN_FOLD.get(sym, sym))
+    if not raw:
+        return None
+
+    tokens: List[str] = []
+    stress_at = 0
+    for n, tok in enumerate(raw):
+        if n == stressed:
+            stress_at = len(tokens)
+        nxt = raw[n + 1] if n + 1 < len(raw) else ""
+        if tok == "i" and nxt:
+            tok = "ɪ"  # old-style short i; a final i is the "happy" vowel in both notations
+        elif tok == "ɪ" and not nxt:
+            tok = "i"  # old-style happy vowel, e.g. /ˈskɪlfəlɪ/
+        elif tok == "r" and tokens and tokens[-1] in VOWELS and nxt not in VOWELS:
+            tokens[-1] = R_FOLD.get(tokens[-1], tokens[-1])  # non-prevocalic r
+            continue
+        elif tok == "ə" and nxt in ("n", "l") and tokens and tokens[-1] in CONSONANTS:
+            continue  # syllabic n / l
+        tokens.append(tok)
+    if not tokens:
+        return None
+
+    vowels = [n for n, tok in enumerate(tokens) if tok in VOWELS]
+    if stressed >= 0:
+        rhyme = next((n for n in vowels if n >= stress_at), vowels[-1] if vowels else 0)
+    else:
+        rhyme = vowels[-1] if vowels else 0
+    return tuple(tokens), rhyme
+
+
+def normalize_phonetic(text: str) -> List[Tuple[Tokens, int]]:
+    """
+    All transcriptions in a phonetic cell as (tokens, rhyme start), deduplicated.
+    Examples:
+        "/ðə; ði/"                  -> [(("ð", "ə"), 1), (("ð", "i"), 1)]
+        "英 [dɪ'vaɪz] 美 [dɪ'vaɪz]"  -> [(("d", "ɪ", "v", "aɪ", "z"), 3)]
+    For 英/美 cells the US transcription comes first.
+    """
+    brackets = BRACKET_RE.findall(text or "")
+    if brackets:
+        parts = [t for side, t in brackets if side == "美"] + [t for side, t in brackets if side == "英"]
+    else:
+        slashes = SLASH_RE.findall(text or "")
+        parts = slashes or [(text or "").strip().strip("/[]")]
+
+    out: List[Tuple[Tokens, int]] = []
+    seen = set()
+    for part in parts:
+        for variant in VARIANT_SPLIT_RE.split(part):
+            parsed = _tokenize(variant)
+            if parsed and parsed[0] not in seen:
+                seen.add(parsed[0])
+                out.append(parsed)
+    return out
+
+
+def _reversed_key(tokens: Sequence[str]) -> str:
+    return " ".join(reversed(tokens)) + " "
+
+
+def _masked_keys(tokens: Tokens) -> Iterable[str]:
+    for i in range(len(tokens)):
+        yield " ".join(tokens[:i] + (MASK,) + tokens[i + 1 :])
+
+
+def iter_bracket_phonetics(path: Path, *, encoding: str = "utf-8") -> Iterable[Tuple[str, str]]:
+    """(word, "英 [...] 美 [...]") for each entry of a 六级/初中-style TXT."""
+    with open_text(path, "r", encoding=encoding, errors="replace") as fh:
+        for raw in fh:
+            if not raw.strip() or raw.lstrip().startswith("#"):
+                continue
+            left = raw.split("\t", 1)[0].strip().strip('"')
+            head = CET6_HEAD_RE.match(left)
+            if head:
+                yield head.group(1).strip(), head.group(0)[head.end(1) :].strip()
+
+
+class PhoneticIndex:
+    """Sorted reversed-token keys over (word, transcription) entries, numbered in rank order."""
+
+    def __init__(self, state: Dict[str, object]) -> None:
+        self.words: List[str] = state["words"]  # type: ignore[assignment]
+        self.ranks: List[int] = state["ranks"]  # type: ignore[assignment]
+        self.phonetics: List[str] = state["phonetics"]  # type: ignore[assignment]
+        self.entry_word: List[int] = state["entry_word"]  # type: ignore[assignment]
+        self.entry_tokens: List[Tokens] = state["entry_tokens"]  # type: ignore[assignment]
+        self.entry_rhyme: List[int] = state["entry_rhyme"]  # type: ignore[assignment]
+        self.keys: List[str] = state["keys"]  # type: ignore[assignment]
+        self.key_entries: List[int] = state["key_entries"]  # type: ignore[assignment]
+        self.rhyme_keys: List[str] = state["rhyme_keys"]  # type: ignore[assignment]
+        self.rhyme_entries: List[int] = state["rhyme_entries"]  # type: ignore[assignment]
+        self.masked: Dict[str, Tuple[int, ...]] = state["masked"]  # type: ignore[assignment]
+        self.word_ids: Dict[str, int] = {w.lower(): i for i, w in enumerate(self.words)}
+        # entries of a word are consecutive: word w owns entries word_start[w] .. word_start[w + 1] - 1
+        self.word_start: List[int] = [0] * (len(self.words) + 1)
+        for w in self.entry_word:
+            self.word_start[w + 1] += 1
+        for w in range(len(self.words)):
+            self.word_start[w + 1] += self.word_start[w]
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str, str]]) -> "PhoneticIndex":
+        """Build from (rank, word, phonetic) rows; a word keeps its best rank and first usable phonetic."""
+        best: Dict[str, Tuple[int, str, str, List[Tuple[Tokens, int]]]] = {}
+        for rank, word, phonetic in rows:
+            key = word.strip().lower()
+            old = best.get(key)
+            if not key or (old is not None and rank >= old[0]):
+                continue
+            parsed = normalize_phonetic(phonetic)
+            if not parsed:
+                continue
+            best[key] = (rank, word.strip(), phonetic, parsed) if old is None else (rank,) + old[1:]
+
+        words: List[str] = []
+        ranks: List[int] = []
+        phonetics: List[str] = []
+        entry_word: List[int] = []
+        entry_tokens: List[Tokens] = []
+        entry_rhyme: List[int] = []
+        for rank, word, phonetic, parsed in sorted(best.values(), key=lambda r: (r[0], r[1].lower())):
+            for tokens, rhyme in parsed:
+                entry_word.append(len(words))
+                entry_tokens.append(tokens)
+                entry_rhyme.append(rhyme)
+            words.append(word)
+            ranks.append(rank)
+            phonetics.append(phonetic)
+
+        order = sorted(range(len(entry_tokens)), key=lambda e: _reversed_key(entry_tokens[e]))
+        # rhyme keys hold only the stressed tail; equal tails stay in entry (= rank) order
+        rhyme_order = sorted(
+            range(len(entry_tokens)), key=lambda e: (_reversed_key(entry_tokens[e][entry_rhyme[e] :]), e)
+        )
+        masked: Dict[str, List[int]] = {}
+        for e, tokens in enumerate(entry_tokens):
+            for key in _masked_keys(tokens):
+                masked.setdefault(key, []).append(e)
+        return cls(
+            {
+                "words": words,
+                "ranks": ranks,
+                "phonetics": phonetics,
+                "entry_word": entry_word,
+                "entry_tokens": entry_tokens,
+                "entry_rhyme": entry_rhyme,
+                "keys": [_reversed_key(entry_tokens[e]) for e in order],
+                "key_entries": order,
+                "rhyme_keys": [_reversed_key(entry_tokens[e][entry_rhyme[e] :]) for e in rhyme_order],
+                "rhyme_entries": rhyme_order,
+                "masked": {k: tuple(v) for k, v in masked.items()},
+            }
+        )
+
+    def state(self) -> Dict[str, object]:
+        return {
+            "words": self.words,
+            "ranks": self.ranks,
+            "phonetics": self.phonetics,
+            "entry_word": self.entry_word,
+            "entry_tokens": self.entry_tokens,
+            "entry_rhyme": self.entry_rhyme,
+            "keys": self.keys,
+            "key_entries": self.key_entries,
+            "rhyme_keys": self.rhyme_keys,
+            "rhyme_entries": self.rhyme_entries,
+            "masked": self.masked,
+        }
+
+    def _matches(self, entries: Iterable[int], limit: int, exclude: int = -1) -> List[Match]:
+        """The first `limit` distinct words of entries given in rank order."""
+        out: List[Match] = []
+        last = -1
+        for e in entries:
+            w = self.entry_word[e]
+            if w == last or w == exclude:
+                continue
+            last = w
+            out.append((self.ranks[w], self.words[w], self.phonetics[w]))
+            if len(out) >= limit:
+                break
+        return out
+
+    def _range(self, tokens: Sequence[str]) -> Tuple[int, int]:
+        prefix = _reversed_key(tokens)
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def transcriptions(self, word: str) -> List[Tuple[Tokens, int]]:
+        w = self.word_ids.get(word.strip().lower())
+        if w is None:
+            return []
+        return [(self.entry_tokens[e], self.entry_rhyme[e]) for e in range(self.word_start[w], self.word_start[w + 1])]
+
+    def ending(self, ending: str, *, limit: int = 20) -> List[Match]:
+        """Words whose transcription ends with the given sounds, e.g. "-ʃən" or "/ʃn/"."""
+        out: List[Match] = []
+        for tokens, _ in normalize_phonetic(ending.replace("-", "")):
+            lo, hi = self._range(tokens)
+            out = self._merge(out, self._matches(sorted(self.key_entries[lo:hi]), limit), limit)
+        return out
+
+    def rhymes(self, word: str, *, limit: int = 20) -> List[Match]:
+        """Perfect rhymes: the same sounds from the stressed vowel to the end."""
+        exclude = self.word_ids.get(word.strip().lower(), -1)
+        out: List[Match] = []
+        for tokens, rhyme in self.transcriptions(word):
+            key = _reversed_key(tokens[rhyme:])
+            lo = bisect_left(self.rhyme_keys, key)
+            hi = bisect_left(self.rhyme_keys, key + " ", lo)
+            out = self._merge(out, self._matches(self.rhyme_entries[lo:hi], limit, exclude), limit)
+        return out
+
+    def minimal_pairs(self, word: str, *, limit: int = 20) -> List[Match]:
+        """Words whose transcription differs from the word's in exactly one sound."""
+        exclude = self.word_ids.get(word.strip().lower(), -1)
+        out: List[Match] = []
+        for tokens, _ in self.transcriptions(word):
+            hits = [
+                e
+                for key in _masked_keys(tokens)
+                for e in self.masked.get(key, ())
+                if self.entry_tokens[e] != tokens
+            ]
+            out = self._merge(out, self._matches(sorted(hits), limit, exclude), limit)
+        return out
+
+    @staticmethod
+    def _merge(a: List[Match], b: List[Match], limit: int) -> List[Match]:
+        if not a:
+            return b
+        seen = {m[1] for m in a}
+        return sorted(a + [m for m in b if m[1] not in seen])[:limit]
+
+
+def _source_signature(paths: Sequence[Path]) -> List[Tuple[str, int, int]]:
+    out = []
+    for p in paths:
+        st = p.stat()
+        out.append((p.name, st.st_size, st.st_mtime_ns))
+    return out
+
+
+def iter_index_rows(csv_paths: Sequence[Path], bracket_paths: Sequence[Path]) -> Iterable[Tuple[int, str, str]]:
+    """(rank, word, phonetic) from the COCA CSVs, then TXT entries for words without a usable COCA phonetic."""
+    ranks: Dict[str, int] = {}
+    covered = set()
+    for row in iter_converted_rows(csv_paths):
+        try:
+            rank = int((row.get("rank") or "").strip())
+        except ValueError:
+            continue
+        word = (row.get("word") or "").strip()
+        phonetic = row.get("phonetic") or ""
+        ranks.setdefault(word.lower(), rank)
+        if normalize_phonetic(phonetic):
+            covered.add(word.lower())
+            yield rank, word, phonetic
+    for path in bracket_paths:
+        for word, phonetic in iter_bracket_phonetics(path):
+            if word.lower() not in covered:
+                yield ranks.get(word.lower(), UNRANKED), word, phonetic
+
+
+def load_phonetic_index(
+    csv_dir: Path,
+    cache_path: Optional[Path] = None,
+    *,
+    bracket_sources: bool = True,
+) -> PhoneticIndex:
+    """
+    Load the index from its pickle cache, rebuilding it when any source file in
+    csv_dir was added, removed or modified since the cache was written.
+    """
+    csv_paths = find_converted_csvs(csv_dir)
+    if not csv_paths:
+        raise FileNotFoundError(f"未找到 COCA CSV 文件: {csv_dir}")
+    bracket_paths = [csv_dir / name for name in BRACKET_PHONETIC_FILES if bracket_sources and (csv_dir / name).exists()]
+    cache_path = cache_path or (csv_dir / INDEX_CACHE_NAME)
+    signature = _source_signature(csv_paths + bracket_paths)
+
+    if cache_path.exists():
+        try:
+            with cache_path.open("rb") as f:
+                cached = pickle.load(f)
+            if cached.get("version") == INDEX_VERSION and cached.get("signature") == signature:
+                return PhoneticIndex(cached["state"])
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    index = PhoneticIndex.build(iter_index_rows(csv_paths, bracket_paths))
+    try:
+        with cache_path.open("wb") as f:
+            pickle.dump(
+                {"version": INDEX_VERSION, "signature": signature, "state": index.state()},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+    except OSError:
+        pass  # read-only directory: just skip the cache
+    return index
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="按读音检索单词：词尾、押韵、最小对立对（结果按 COCA 排名排序）")
+    p.add_argument(
+        "--csv-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="COCA*.csv 所在目录（默认：脚本所在目录）",
+    )
+    p.add_argument("--cache", type=Path, default=None, help=f"索引缓存路径（默认：CSV_DIR/{INDEX_CACHE_NAME}）")
+    p.add_argument("--no-bracket-sources", action="store_true", help="不使用六级/初中词库补充缺失的音标")
+    p.add_argument("--ending", action="append", default=[], help='按词尾读音检索，如 --ending=-ʃən 或 --ending ʃən')
+    p.add_argument("--rhymes", action="append", default=[], help="检索与某单词押韵的词，如 --rhymes nation")
+    p.add_argument("--pairs", action="append", default=[], help="检索与某单词只差一个音的词，如 --pairs ship")
+    p.add_argument("--show", action="append", default=[], help="显示某单词的规范化音标")
+    p.add_argument("--limit", type=int, default=20, help="每个查询最多返回的结果数（默认：20）")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    index = load_phonetic_index(args.csv_dir, args.cache, bracket_sources=not args.no_bracket_sources)
+    print(f"索引 {len(index.words)} 个单词 / {len(index.keys)} 个读音（{(time.perf_counter() - t0) * 1000:.0f} ms）")
+
+    for word in args.show:
+        for tokens, rhyme in index.transcriptions(word):
+            print(f"{word}: /{' '.join(tokens)}/  韵脚 /{' '.join(tokens[rhyme:])}/")
+
+    queries = (
+        [("词尾", q, index.ending) for q in args.ending]
+        + [("押韵", q, index.rhymes) for q in args.rhymes]
+        + [("最小对立", q, index.minimal_pairs) for q in args.pairs]
+    )
+    for title, query, fn in queries:
+        t0 = time.perf_counter()
+        matches = fn(query, limit=args.limit)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"\n{title} {query}: {len(matches)} 个结果（{elapsed:.3f} ms）")
+        for rank, word, phonetic in matches:
+            print(f"  {rank if rank != UNRANKED else '-':>6}  {word:<20} {phonetic}")
+
+
+if __name__ == "__main__":
+    main()
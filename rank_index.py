@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Persistent rank -> byte offset index over a source TXT file.
+
+convert() numbers the non-blank, non-'#' lines of a TXT file 1, 2, 3, ...
+Finding rank N normally means reading every line before it. This module builds,
+in one pass, a sidecar "<input>.ranks" file holding the byte offset of every
+ranked line as a little-endian uint32 array, so a rank range can be read with a
+single seek. Lines end at "\n", "\r\n" or a bare "\r", as in convert()'s
+universal-newline text mode, so ranks agree with a full conversion.
+
+Sidecar layout: MAGIC, then "<QqI" (source size, source mtime_ns, line count),
+then count x uint32 offsets. The index is rebuilt automatically when the source
+size or mtime changes. Compressed inputs (.gz/.xz/.bz2) cannot be seeked and
+are rejected, as are encodings whose newlines are not the single bytes
+b"\n" / b"\r" (e.g. utf-16).
+"""
+
+import argparse
+import csv
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from compress_io import compression_suffix
+
+MAGIC = b"RNKIDX2\0"
+HEADER = struct.Struct("<QqI")
+INDEX_SUFFIX = ".ranks"
+RANK_RANGE_RE = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+)\s*)?$")
+
+
+def parse_rank_range(spec: str) -> Tuple[int, int]:
+    """
+    Parse "A-B" (inclusive) or a single "A".
+    Example: parse_rank_range("1500-1600") -> (1500, 1600)
+    """
+    m = RANK_RANGE_RE.match(spec or "")
+    if not m:
+        raise ValueError(f'rank range must look like "1500-1600": {spec!r}')
+    start = int(m.group(1))
+    end = int(m.group(2) or start)
+    if start < 1 or end < start:
+        raise ValueError(f"invalid rank range: {spec!r}")
+    return start, end
+
+
+def index_path_for(input_path: Path) -> Path:
+    return input_path.with_name(input_path.name + INDEX_SUFFIX)
+
+
+def _check_encoding(encoding: str) -> None:
+    if "\n".encode(encoding) != b"\n" or "\r".encode(encoding) != b"\r":
+        raise ValueError(f"编码 {encoding} 的换行符不是单字节 \\n/\\r，无法按字节偏移索引")
+
+
+def _iter_raw_lines(fh: BinaryIO) -> Iterator[bytes]:
+    """Binary lines ending at b"\n", b"\r\n" or a bare b"\r" (universal newlines)."""
+    for raw in fh:
+        if b"\r" not in raw:
+            yield raw
+            continue
+        pos = 0
+        while pos < len(raw):
+            cr = raw.find(b"\r", pos)
+            if cr < 0:
+                yield raw[pos:]
+                break
+            end = cr + 2 if raw[cr + 1 : cr + 2] == b"\n" else cr + 1
+            yield raw[pos:end]
+            pos = end
+
+
+def _is_ranked(raw: bytes, encoding: str) -> bool:
+    # same rule as convert(): skip blank lines and lines starting with '#'
+    text = raw.decode(encoding, errors="replace")
+    return bool(text.strip()) and not text.lstrip().startswith("#")
+
+
+def build_rank_index(input_path: Path, *, encoding: str = "utf-8") -> array:
+    """Scan the file once and return the byte offset of every ranked line."""
+    if compression_suffix(input_path):
+        raise ValueError(f"压缩文件无法按偏移随机读取，请先解压: {input_path}")
+    _check_encoding(encoding)
+    offsets = array("I")
+    pos = 0
+    with input_path.open("rb") as fh:
+        for raw in _iter_raw_lines(fh):
+            if _is_ranked(raw, encoding):
+                if pos > 0xFFFFFFFF:
+                    raise ValueError(f"文件超过 4 GiB，无法用 uint32 偏移索引: {input_path}")
+                offsets.append(pos)
+            pos += len(raw)
+    return offsets
+
+
+def _write_index(index_path: Path, offsets: array, size: int, mtime_ns: int) -> None:
+    data = array("I", offsets)
+    if sys.byteorder == "big":
+        data.byteswap()
+    tmp = index_path.with_name(index_path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(size, mtime_ns, len(data)))
+        data.tofile(f)
+    os.replace(tmp, index_path)
+
+
+def _read_index(index_path: Path, size: int, mtime_ns: int) -> Optional[array]:
+    try:
+        with index_path.open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                return None
+            idx_size, idx_mtime, count = HEADER.unpack(header)
+            if idx_size != size or idx_mtime != mtime_ns:
+                return None
+            offsets = array("I")
+            offsets.fromfile(f, count)
+    except (OSError, EOFError):
+        return None
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets
+
+
+def load_rank_index(input_path: Path, *, encoding: str = "utf-8", write: bool = True) -> array:
+    """
+    Return the rank offsets for input_path, from the sidecar when it is still
+    valid (same size and mtime), otherwise by rebuilding (and saving) it.
+    """
+    st = input_path.stat()
+    index_path = index_path_for(input_path)
+    offsets = _read_index(index_path, st.st_size, st.st_mtime_ns)
+    if offsets is not None:
+        return offsets
+    offsets = build_rank_index(input_path, encoding=encoding)
+    if write:
+        try:
+            _write_index(index_path, offsets, st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass  # read-only directory: the in-memory index still works
+    return offsets
+
+
+def iter_ranked_lines(
+    input_path: Path,
+    start: int,
+    end: int,
+    *,
+    encoding: str = "utf-8",
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (rank, line) for ranks start..end (inclusive, clipped to the file),
+    seeking straight to the first one.
+    """
+    _check_encoding(encoding)
+    offsets = load_rank_index(input_path, encoding=encoding)
+    end = min(end, len(offsets))
+    if start > end:
+        return
+    with input_path.open("rb") as fh:
+        fh.seek(offsets[start - 1])
+        rank = start
+        for raw in _iter_raw_lines(fh):
+            if not _is_ranked(raw, encoding):
+                continue
+            yield rank, raw.decode(encoding, errors="replace").rstrip("\r\n") + "\n"
+            if rank >= end:
+                return
+            rank += 1
+
+
+def main() -> None:
+    # imported here: word_basic_to_csv imports this module for --ranks
+    from word_basic_to_csv import CSV_HEADER, convert
+
+    p = argparse.ArgumentParser(description="按排名随机读取词库 TXT（自动维护 <输入>.ranks 偏移索引）")
+    p.add_argument("input", type=Path, help="输入 TXT 文件路径")
+    p.add_argument("--ranks", default=None, help='要读取的排名范围，如 "1500-1600" 或 "42"；省略则只建立索引')
+    p.add_argument("--raw", action="store_true", help="输出原始行（默认：输出 convert() 解析后的 CSV 行）")
+    p.add_argument("--encoding", default="utf-8", help="输入文件编码（默认：utf-8）")
+    args = p.parse_args()
+
+    if args.ranks is None:
+        offsets = load_rank_index(args.input, encoding=args.encoding)
+        print(f"索引共 {len(offsets)} 个排名 -> {index_path_for(args.input)}")
+        return
+
+    start, end = parse_rank_range(args.ranks)
+    lines = iter_ranked_lines(args.input, start, end, encoding=args.encoding)
+    if args.raw:
+        for rank, line in lines:
+            sys.stdout.write(f"{rank}\t{line}")
+        return
+    writer = csv.writer(sys.stdout)
+    writer.writerow(CSV_HEADER)
+    writer.writerows(convert((line for _, line in lines), first_rank=start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Profile English text against COCA rank and level labels.
+
+The lookup table (word -> (rank, label bitmask)) is built once from the
+generated COCA CSVs (rank, level, word, ...) and cached next to them as a pickle.
+Each input document is tokenised as a stream with the same WORD_RE token shape
+as extract_words_only.py; several documents are analysed in a process pool.
+
+Per document the report contains:
+- token / type counts and the share of tokens found in the COCA list
+- a rank histogram (bucket width --bin-size, default 1000)
+- coverage per label (小学, 初中, ..., TOEFL), as a share of tokens
+- the most frequent out-of-list words
+"""
+
+import argparse
+import json
+import pickle
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from compress_io import open_text
+from extract_words_only import WORD_RE
+from word_basic_to_csv import AUTO_LABEL_FILES, find_converted_csvs, iter_converted_rows, split_level
+
+TABLE_CACHE_NAME = ".rank_table.pickle"
+TABLE_VERSION = 1
+CHUNK_SIZE = 1 << 20
+TOKEN_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'-")
+
+# word(lower) -> (rank, label bitmask)
+RankTable = Dict[str, Tuple[int, int]]
+
+_worker_table: Optional[RankTable] = None
+_worker_labels: Sequence[str] = ()
+
+
+def build_rank_table(csv_paths: Iterable[Path]) -> Tuple[List[str], RankTable]:
+    """
+    Build the word -> (rank, label bitmask) table from generated CSVs.
+    Label bits follow AUTO_LABEL_FILES order, then any other labels in appearance order.
+    A word listed twice keeps its best (lowest) rank and the union of its labels.
+    """
+    labels: List[str] = list(AUTO_LABEL_FILES.keys())
+    bits: Dict[str, int] = {lbl: 1 << i for i, lbl in enumerate(labels)}
+    table: RankTable = {}
+
+    for row in iter_converted_rows(csv_paths):
+        word = (row.get("word") or "").strip().lower()
+        try:
+            rank = int((row.get("rank") or "").strip())
+        except ValueError:
+            continue
+        if not word:
+            continue
+        mask = 0
+        for lbl in split_level(row.get("level") or ""):
+            if lbl not in bits:
+                bits[lbl] = 1 << len(labels)
+                labels.append(lbl)
+            mask |= bits[lbl]
+        old = table.get(word)
+        if old is not None:
+            rank, mask = min(rank, old[0]), mask | old[1]
+        table[word] = (rank, mask)
+    return labels, table
+
+
+def _csv_signature(csv_paths: Sequence[Path]) -> List[Tuple[str, int, int]]:
+    out = []
+    for p in csv_paths:
+        st = p.stat()
+        out.append((p.name, st.st_size, st.st_mtime_ns))
+    return out
+
+
+def load_rank_table(csv_dir: Path, cache_path: Optional[Path] = None) -> Tuple[List[str], RankTable]:
+    """
+    Load the lookup table from its pickle cache, rebuilding it when any CSV
+    in csv_dir was added, removed or modified since the cache was written.
+    """
+    csv_paths = find_converted_csvs(csv_dir)
+    if not csv_paths:
+        raise FileNotFoundError(f"未找到 COCA CSV 文件: {csv_dir}")
+    cache_path = cache_path or (csv_dir / TABLE_CACHE_NAME)
+    signature = _csv_signature(csv_paths)
+
+    if cache_path.exists():
+        try:
+            with cache_path.open("rb") as f:
+                cached = pickle.load(f)
+            if cached.get("version") == TABLE_VERSION and cached.get("signature") == signature:
+                return cached["labels"], cached["table"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    labels, table = build_rank_table(csv_paths)
+    try:
+        with cache_path.open("wb") as f:
+            pickle.dump(
+                {"version": TABLE_VERSION, "signature": signature, "labels": labels, "table": table},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+    except OSError:
+        pass  # read-only directory: just skip the cache
+    return labels, table
+
+
+def iter_token_counts(chunks: Iterable[str]) -> Iterator[Counter]:
+    """
+    Tokenise a stream of text chunks, yielding one Counter of raw tokens per chunk.
+    A token cut by a chunk boundary is carried over to the next chunk.
+    """
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk
+        cut = len(text)
+        while cut > 0 and text[cut - 1] in TOKEN_CHARS:
+            cut -= 1
+        carry = text[cut:]
+        yield Counter(WORD_RE.findall(text, 0, cut))
+    if carry:
+        yield Counter(WORD_RE.findall(carry))
+
+
+def iter_file_chunks(path: Path, *, encoding: str = "utf-8", chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    with open_text(path, "r", encoding=encoding, errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _lookup(word: str, table: RankTable) -> Optional[Tuple[int, int]]:
+    hit = table.get(word)
+    if hit is None:
+        stripped = word.rstrip("'-")
+        if stripped.endswith("'s"):
+            stripped = stripped[:-2]
+        if stripped != word:
+            hit = table.get(stripped)
+    return hit
+
+
+def analyze_counts(
+    counts: Counter,
+    table: RankTable,
+    labels: Sequence[str],
+    *,
+    bin_size: int = 1000,
+    top_oov: int = 50,
+) -> Dict[str, object]:
+    """
+    Profile token counts against the lookup table.
+    Only distinct words are looked up, so cost grows with vocabulary, not text size.
+    """
+    lowered: Counter = Counter()
+    for tok, n in counts.items():
+        lowered[tok.lower()] += n
+
+    tokens = sum(lowered.values())
+    known = 0
+    histogram: Counter = Counter()
+    label_tokens = [0] * len(labels)
+    oov: Counter = Counter()
+
+    for word, n in lowered.items():
+        hit = _lookup(word, table)
+        if hit is None:
+            oov[word] = n
+            continue
+        rank, mask = hit
+        known += n
+        histogram[(rank - 1) // bin_size] += n
+        i = 0
+        while mask:
+            if mask & 1:
+                label_tokens[i] += n
+            mask >>= 1
+            i += 1
+
+    def share(n: int) -> float:
+        return round(n / tokens, 4) if tokens else 0.0
+
+    return {
+        "tokens": tokens,
+        "types": len(lowered),
+        "known_tokens": known,
+        "coverage": share(known),
+        "rank_histogram": {
+            f"{b * bin_size + 1}-{(b + 1) * bin_size}": histogram[b] for b in sorted(histogram)
+        },
+        "label_coverage": {lbl: share(label_tokens[i]) for i, lbl in enumerate(labels) if label_tokens[i]},
+        "oov_tokens": sum(oov.values()),
+        "oov_words": dict(oov.most_common(top_oov)),
+    }
+
+
+def analyze_text(
+    text: str,
+    table: RankTable,
+    labels: Sequence[str],
+    *,
+    bin_size: int = 1000,
+    top_oov: int = 50,
+) -> Dict[str, object]:
+    """Profile an in-memory string."""
+    return analyze_counts(Counter(WORD_RE.findall(text)), table, labels, bin_size=bin_size, top_oov=top_oov)
+
+
+def _init_worker(table: RankTable, labels: Sequence[str]) -> None:
+    global _worker_table, _worker_labels
+    _worker_table = table
+    _worker_labels = labels
+
+
+def _analyze_path(job: Tuple[Path, str, int, int]) -> Dict[str, object]:
+    path, encoding, bin_size, top_oov = job
+    assert _worker_table is not None
+    counts: Counter = Counter()
+    for c in iter_token_counts(iter_file_chunks(path, encoding=encoding)):
+        counts.update(c)
+    report = analyze_counts(counts, _worker_table, _worker_labels, bin_size=bin_size, top_oov=top_oov)
+    report["document"] = str(path)
+    return report
+
+
+def analyze_files(
+    paths: Sequence[Path],
+    table: RankTable,
+    labels: Sequence[str],
+    *,
+    encoding: str = "utf-8",
+    bin_size: int = 1000,
+    top_oov: int = 50,
+    workers: Optional[int] = None,
+) -> List[Dict[str, object]]:
+    """
+    Profile several documents, one process-pool task per file.
+    Reports are returned in input order.
+    """
+    jobs = [(p, encoding, bin_size, top_oov) for p in paths]
+    if workers == 1 or len(jobs) <= 1:
+        _init_worker(table, labels)
+        return [_analyze_path(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(table, labels)) as pool:
+        return list(pool.map(_analyze_path, jobs))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Profile English text files against COCA rank and level labels.")
+    p.add_argument("inputs", type=Path, nargs="+", help="text files to analyse")
+    p.add_argument(
+        "--csv-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent,
+        help="directory with the generated COCA*.csv files (default: this script's directory)",
+    )
+    p.add_argument("--table-cache", type=Path, default=None, help=f"lookup table cache (default: CSV_DIR/{TABLE_CACHE_NAME})")
+    p.add_argument("--encoding", default="utf-8", help="input file encoding (default: utf-8)")
+    p.add_argument("--bin-size", type=int, default=1000, help="rank histogram bucket width (default: 1000)")
+    p.add_argument("--top-oov", type=int, default=50, help="number of out-of-list words to report (default: 50)")
+    p.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("-o", "--output", type=Path, default=None, help="write the JSON report here (default: stdout)")
+    args = p.parse_args()
+
+    labels, table = load_rank_table(args.csv_dir, args.table_cache)
+    reports = analyze_files(
+        args.inputs,
+        table,
+        labels,
+        encoding=args.encoding,
+        bin_size=args.bin_size,
+        top_oov=args.top_oov,
+        workers=args.workers,
+    )
+    text = json.dumps(reports, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+        print(f"已分析 {len(reports)} 个文档 -> {args.output}")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,32 @@ Percent values in the meaning (e.g., "28%") are stripped.
 """
 
 import argparse
+import codecs
 import csv
 import re
 from pathlib import Path
-from collections import defaultdict
-from typing import Iterable, Tuple, Optional, Set, Dict, List, Sequence, DefaultDict
+from collections import OrderedDict, defaultdict
+from typing import IO, Any, Iterable, Iterator, Tuple, Optional, Set, Dict, List, Sequence, DefaultDict
+
+from apkg_export import DEFAULT_DECK_NAME, write_apkg
+from compress_io import open_text, strip_compression_suffix
+from lemma_index import EXCEPTIONS_FILE, load_lemma_table
+from rank_index import iter_ranked_lines, parse_rank_range
 
 WORD_RE = re.compile(r"^[A-Za-z][A-Za-z'\-]*")
 PHONETIC_RE = re.compile(r"/[^/]+/")
 EXAMPLE_RE = re.compile(r"[A-Z][^.?!]{15,}?[.?!]")
 PERCENT_RE = re.compile(r"\d+%")
+LEVEL_SPLIT_RE = re.compile(r"[、,，]")
+
+# Generated CSV chunks, e.g. "COCA 2024 美音终极版__第2万单词__10001-12000.csv"
+CONVERTED_CSV_GLOB = "COCA*.csv*"
+COPY_MARKERS = ("副本", " copy")
+
+CSV_HEADER = ["rank", "level", "word", "phonetic", "meaning", "full_meaning", "example", "source"]
+UNLABELLED = "unlabelled"
+# per-level split: open files kept before the LRU starts closing/reopening them
+SPLIT_MAX_OPEN = 32
 
 LEVEL_FROM_FILENAME = {
     "COCA": "COCA",
@@ -54,19 +70,25 @@ def infer_level_from_path(input_path: Path) -> str:
     return ""
 
 
-def load_word_set(word_list_path: Path, *, encoding: str = "utf-8") -> Set[str]:
+def iter_word_list(word_list_path: Path, *, encoding: str = "utf-8") -> Iterator[str]:
     """
-    Load a one-word-per-line word list file into a lowercase set.
+    Yield the words of a one-word-per-line word list file, in file order.
     Blank lines and comment lines starting with '#' are ignored.
     """
-    words: Set[str] = set()
-    with word_list_path.open("r", encoding=encoding, errors="replace") as fh:
+    with open_text(word_list_path, "r", encoding=encoding, errors="replace") as fh:
         for raw in fh:
             s = raw.strip()
             if not s or s.startswith("#"):
                 continue
-            words.add(s.lower())
-    return words
+            yield s
+
+
+def load_word_set(word_list_path: Path, *, encoding: str = "utf-8") -> Set[str]:
+    """
+    Load a one-word-per-line word list file into a lowercase set.
+    Blank lines and comment lines starting with '#' are ignored.
+    """
+    return {w.lower() for w in iter_word_list(word_list_path, encoding=encoding)}
 
 
 def build_label_sets(
@@ -149,7 +171,7 @@ def load_existing_levels_by_rank(csv_path: Path) -> Dict[int, str]:
     """
     for enc in ("utf-8-sig", "utf-8"):
         try:
-            with csv_path.open("r", newline="", encoding=enc, errors="replace") as f:
+            with open_text(csv_path, "r", newline="", encoding=enc, errors="replace") as f:
                 reader = csv.DictReader(f)
                 if not reader.fieldnames:
                     return {}
@@ -168,6 +190,72 @@ def load_existing_levels_by_rank(csv_path: Path) -> Dict[int, str]:
     return {}
 
 
+def splice_rank_rows(
+    csv_path: Path,
+    rows: Sequence[Sequence[Any]],
+    start: int,
+    end: int,
+    *,
+    encoding: str = "utf-8-sig",
+) -> List[Sequence[Any]]:
+    """
+    Replace ranks start..end of an already-generated CSV with rows, keeping every
+    other row in rank order. A missing file yields just rows.
+    Example: an existing 1-2000 CSV spliced with ranks 1500-1600 -> 2000 rows
+    """
+    kept: List[Tuple[int, Sequence[Any]]] = []
+    try:
+        with open_text(csv_path, "r", newline="", encoding=encoding, errors="replace") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is not None and header != CSV_HEADER:
+                raise ValueError(f"已有输出的表头与当前格式不一致，无法按排名拼接: {csv_path}")
+            last_rank = 0
+            for row in reader:
+                try:
+                    last_rank = int((row[0] if row else "").strip())
+                except ValueError:
+                    pass  # keep an unranked row right after its predecessor
+                if not start <= last_rank <= end:
+                    kept.append((last_rank, row))
+    except FileNotFoundError:
+        pass
+    kept.extend((int(row[0]), row) for row in rows)
+    kept.sort(key=lambda item: item[0])  # stable: file order within a rank
+    return [row for _, row in kept]
+
+
+def split_level(level: str) -> List[str]:
+    """
+    Split a level column value into its tags.
+    Example: "小学、初中" -> ["小学", "初中"]
+    """
+    return [t.strip() for t in LEVEL_SPLIT_RE.split(level or "") if t.strip()]
+
+
+def find_converted_csvs(directory: Path, pattern: str = CONVERTED_CSV_GLOB) -> List[Path]:
+    """
+    List generated CSV chunks in a directory, sorted by name (i.e. by rank range).
+    Compressed chunks ('*.csv.gz' etc.) are included; duplicate copies like
+    '*_副本.csv' / '* copy.csv' are skipped.
+    """
+    out = []
+    for p in directory.glob(pattern):
+        plain = strip_compression_suffix(p)
+        if p.is_file() and plain.suffix.lower() == ".csv" and not any(m in plain.stem for m in COPY_MARKERS):
+            out.append(p)
+    return sorted(out)
+
+
+def iter_converted_rows(csv_paths: Iterable[Path]) -> Iterator[Dict[str, str]]:
+    """
+    Stream rows (as dicts keyed by the CSV header) from generated CSV files, in file order.
+    """
+    for csv_path in csv_paths:
+        with open_text(csv_path, "r", newline="", encoding="utf-8-sig", errors="replace") as f:
+            yield from csv.DictReader(f)
+
+
 def parse_label_spec(spec: str) -> Tuple[str, Path]:
     """
     Parse label spec in the form:
@@ -297,6 +385,39 @@ def extract_fields(line: str) -> Tuple[str, str, str, str, str, str]:
     return word, phonetic, meaning, full_meaning, example, source
 
 
+def build_label_index(
+    label_sets: Sequence[Tuple[str, Set[str]]],
+    *,
+    lemma_table: Optional[Dict[str, str]] = None,
+) -> Dict[str, Tuple[str, ...]]:
+    """
+    Compile label sets into word(lower) -> labels (in label_sets order), so that
+    tagging a row is a single dict probe.
+
+    With a lemma_table (variant -> lemma, see lemma_index), an inflected form
+    also gets the labels of its lemma, e.g. "studies" -> labels of "study".
+    """
+    index: Dict[str, Tuple[str, ...]] = {}
+    for lbl, words in label_sets:
+        for w in words:
+            labels = index.get(w, ())
+            if lbl not in labels:
+                index[w] = labels + (lbl,)
+    if lemma_table:
+        order = {lbl: i for i, (lbl, _) in enumerate(label_sets)}
+        for variant, lemma in lemma_table.items():
+            lemma_labels = index.get(lemma)
+            if not lemma_labels:
+                continue
+            own = index.get(variant)
+            if own is None:
+                index[variant] = lemma_labels
+            elif own != lemma_labels:
+                merged = set(own) | set(lemma_labels)
+                index[variant] = tuple(sorted(merged, key=order.__getitem__))
+    return index
+
+
 def convert(
     lines: Iterable[str],
     *,
@@ -306,13 +427,22 @@ def convert(
     level_sep: str = ",",
     existing_levels_by_rank: Optional[Dict[int, str]] = None,
     label_sets: Optional[Sequence[Tuple[str, Set[str]]]] = None,
+    first_rank: int = 1,
+    lemma_table: Optional[Dict[str, str]] = None,
+    label_index: Optional[Dict[str, Tuple[str, ...]]] = None,
 ) -> Iterable[Tuple[int, str, str, str, str, str, str, str]]:
     """
     Yield rows in COCA order (i.e., the appearance order in the input file),
     with a 1-based rank column.
+    first_rank: rank of the first non-comment line (for a slice of a file, see rank_index).
+    lemma_table: variant -> lemma; if given, inflected words also match their lemma's labels.
+    label_index: label_sets/lemma_table precompiled with build_label_index(); pass it
+    when converting many files with the same labels to compile them only once.
     Returns: rank, level, word, phonetic, meaning, full_meaning, example, source
     """
-    rank = 0
+    if label_index is None and label_sets:
+        label_index = build_label_index(label_sets, lemma_table=lemma_table)
+    rank = first_rank - 1
     for raw in lines:
         if not raw.strip() or raw.lstrip().startswith("#"):
             continue
@@ -326,10 +456,9 @@ def convert(
         w_lower = word.lower() if word else ""
         if level_words is not None and w_lower and w_lower in level_words:
             row_level = append_level(row_level, level_value, sep=level_sep)
-        if label_sets and w_lower:
-            for lbl, words in label_sets:
-                if w_lower in words:
-                    row_level = append_level(row_level, lbl, sep=level_sep)
+        if label_index and w_lower:
+            for lbl in label_index.get(w_lower, ()):
+                row_level = append_level(row_level, lbl, sep=level_sep)
         yield rank, row_level, word, phonetic, meaning, full_meaning, example, source
 
 
@@ -356,7 +485,7 @@ def convert_file(
         else None
     )
 
-    with input_path.open("r", encoding=encoding, errors="replace") as fh:
+    with open_text(input_path, "r", encoding=encoding, errors="replace") as fh:
         rows = list(
             convert(
                 fh,
@@ -369,14 +498,77 @@ def convert_file(
             )
         )
 
-    with output_path.open("w", newline="", encoding="utf-8") as out:
+    with open_text(output_path, "w", newline="", encoding="utf-8") as out:
         writer = csv.writer(out)
-        writer.writerow(
-            ["rank", "level", "word", "phonetic", "meaning", "full_meaning", "example", "source"]
-        )
+        writer.writerow(CSV_HEADER)
         writer.writerows(rows)
 
 
+def split_rows_by_level(
+    rows: Iterable[Sequence[object]],
+    output_dir: Path,
+    *,
+    stem: str,
+    level_sep: str = ",",
+    fmt: str = "csv",
+    encoding: str = "utf-8",
+    max_open: int = SPLIT_MAX_OPEN,
+) -> Dict[str, int]:
+    """
+    Route each row to one file per level tag in a single pass, plus an "unlabelled" file.
+
+    Files are named "<stem>__<label>.csv" (fmt="csv", full rows) or
+    "<stem>__<label>.txt" (fmt="words", one word per line). Rows keep their
+    input (COCA rank) order. At most max_open files are open at once; the least
+    recently used one is closed and later reopened in append mode.
+    Returns: label -> number of rows written.
+    """
+    if fmt not in ("csv", "words"):
+        raise ValueError(f"unknown split format: {fmt}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".csv" if fmt == "csv" else ".txt"
+    # label -> (file handle, csv writer or the handle itself)
+    open_files: "OrderedDict[str, Tuple[IO[str], Any]]" = OrderedDict()
+    counts: Dict[str, int] = {}
+
+    def writer_for(label: str) -> Any:
+        entry = open_files.get(label)
+        if entry is not None:
+            open_files.move_to_end(label)
+            return entry[1]
+        if len(open_files) >= max(1, max_open):
+            _, (old_fh, _) = open_files.popitem(last=False)
+            old_fh.close()
+        path = output_dir / f"{stem}__{label}{suffix}"
+        is_new = label not in counts
+        if fmt == "csv":
+            fh = path.open("w" if is_new else "a", newline="", encoding=encoding)
+            writer = csv.writer(fh)
+            if is_new:
+                writer.writerow(CSV_HEADER)
+        else:
+            fh = path.open("w" if is_new else "a", encoding=encoding, newline="\n")
+            writer = fh
+        counts.setdefault(label, 0)
+        open_files[label] = (fh, writer)
+        return writer
+
+    try:
+        for row in rows:
+            labels = [t.strip() for t in str(row[1] or "").split(level_sep) if t.strip()]
+            for label in dict.fromkeys(labels) or [UNLABELLED]:
+                writer = writer_for(label)
+                if fmt == "csv":
+                    writer.writerow(row)
+                else:
+                    writer.write(f"{row[2]}\n")
+                counts[label] += 1
+    finally:
+        for fh, _ in open_files.values():
+            fh.close()
+    return counts
+
+
 def convert_file_with_output_encoding(
     input_path: Path,
     output_path: Path,
@@ -389,12 +581,31 @@ def convert_file_with_output_encoding(
     level_sep: str = ",",
     merge_existing_output: bool = False,
     label_sets: Optional[Sequence[Tuple[str, Set[str]]]] = None,
-) -> None:
+    apkg_path: Optional[Path] = None,
+    deck_name: str = DEFAULT_DECK_NAME,
+    compresslevel: Optional[int] = None,
+    compress_threads: int = 1,
+    rank_range: Optional[Tuple[int, int]] = None,
+    split_dir: Optional[Path] = None,
+    split_format: str = "csv",
+    split_max_open: Optional[int] = None,
+    lemma_table: Optional[Dict[str, str]] = None,
+) -> Dict[str, int]:
     """
     Convert TXT to CSV with explicit input/output encodings.
 
     Output columns: rank, level, word, phonetic, meaning, full_meaning, example, source
     Tip: use output_encoding="utf-8-sig" for Excel-friendly UTF-8 with BOM.
+    If apkg_path is given, the same rows are also written as an Anki deck package.
+    Input/output paths ending in .gz/.xz/.bz2 are read/written compressed.
+    rank_range=(A, B) converts only ranks A..B, seeking via the <input>.ranks index,
+    and splices them into an existing output by rank (see splice_rank_rows); the
+    apkg and split outputs get the spliced rows too.
+    split_dir: also write one file per level tag there (see split_rows_by_level).
+    split_max_open: open-file limit for the split; default: enough for every label
+    bucket (labels + base level + unlabelled), at least SPLIT_MAX_OPEN.
+    lemma_table: variant -> lemma table for inflection-aware label matching (see lemma_index).
+    Returns the per-label row counts of the split (empty without split_dir).
     """
     existing_levels_by_rank = (
         load_existing_levels_by_rank(output_path)
@@ -402,33 +613,78 @@ def convert_file_with_output_encoding(
         else None
     )
 
-    with input_path.open("r", encoding=input_encoding, errors="replace") as fh:
+    if rank_range is not None:
+        start, end = rank_range
+        lines: Iterable[str] = (
+            line for _, line in iter_ranked_lines(input_path, start, end, encoding=input_encoding)
+        )
         rows = list(
             convert(
-                fh,
+                lines,
                 level=level,
                 level_words=level_words,
                 level_value=level_value,
                 level_sep=level_sep,
                 existing_levels_by_rank=existing_levels_by_rank,
                 label_sets=label_sets,
+                first_rank=start,
+                lemma_table=lemma_table,
             )
         )
+        # utf-8-sig also reads a plain utf-8 file
+        splice_encoding = "utf-8-sig" if codecs.lookup(output_encoding).name == "utf-8" else output_encoding
+        rows = splice_rank_rows(output_path, rows, start, end, encoding=splice_encoding)
+    else:
+        with open_text(input_path, "r", encoding=input_encoding, errors="replace") as fh:
+            rows = list(
+                convert(
+                    fh,
+                    level=level,
+                    level_words=level_words,
+                    level_value=level_value,
+                    level_sep=level_sep,
+                    existing_levels_by_rank=existing_levels_by_rank,
+                    label_sets=label_sets,
+                    lemma_table=lemma_table,
+                )
+            )
 
-    with output_path.open("w", newline="", encoding=output_encoding) as out:
+    with open_text(
+        output_path,
+        "w",
+        newline="",
+        encoding=output_encoding,
+        compresslevel=compresslevel,
+        threads=compress_threads,
+    ) as out:
         writer = csv.writer(out)
-        writer.writerow(
-            ["rank", "level", "word", "phonetic", "meaning", "full_meaning", "example", "source"]
-        )
+        writer.writerow(CSV_HEADER)
         writer.writerows(rows)
 
+    if apkg_path is not None:
+        write_apkg(rows, apkg_path, deck_name=deck_name)
+
+    if split_dir is None:
+        return {}
+    return split_rows_by_level(
+        rows,
+        split_dir,
+        stem=strip_compression_suffix(output_path).stem,
+        level_sep=level_sep,
+        fmt=split_format,
+        encoding=output_encoding,
+        max_open=split_max_open or max(SPLIT_MAX_OPEN, len(label_sets or ()) + 2),
+    )
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Convert word-list TXT to CSV (rank, level, word, phonetic, meaning, full_meaning)."
     )
-    parser.add_argument("input", type=Path, help="input TXT file")
-    parser.add_argument("output", type=Path, help="output CSV file path")
+    parser.add_argument("input", type=Path, help="input TXT file (.gz/.xz/.bz2 are decompressed on the fly)")
+    parser.add_argument(
+        "output", type=Path, help="output CSV file path (a .gz/.xz/.bz2 suffix writes it compressed)"
+    )
     parser.add_argument(
         "--encoding", default="utf-8", help="file encoding (default: utf-8)"
     )
@@ -485,6 +741,68 @@ def main() -> None:
         action="store_true",
         help="if output CSV already exists, merge its existing level values by rank before appending new tags",
     )
+    parser.add_argument(
+        "--apkg",
+        type=Path,
+        default=None,
+        help="also write the converted rows as an Anki deck package (.apkg); level tags become Anki tags",
+    )
+    parser.add_argument(
+        "--deck-name",
+        default=DEFAULT_DECK_NAME,
+        help=f'deck name used with --apkg (default: "{DEFAULT_DECK_NAME}")',
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        help="compression level for a compressed output (default: 6 for gz/xz, 9 for bz2)",
+    )
+    parser.add_argument(
+        "--compress-threads",
+        type=int,
+        default=1,
+        help="compress the output with N threads via pigz / xz -T / pbzip2 when available (default: 1)",
+    )
+    parser.add_argument(
+        "--ranks",
+        default=None,
+        help=(
+            'only convert ranks A-B (e.g. "1500-1600"), seeking via a cached <input>.ranks offset index; '
+            "an existing output keeps its other ranks (the slice is spliced in by rank, not overwritten)"
+        ),
+    )
+    parser.add_argument(
+        "--split-by-level",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help='also write one file per level tag (plus "unlabelled") into DIR, in the same pass',
+    )
+    parser.add_argument(
+        "--split-format",
+        choices=["csv", "words"],
+        default="csv",
+        help="per-level files as full CSV rows or one-word-per-line word lists (default: csv)",
+    )
+    parser.add_argument(
+        "--split-max-open",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"max per-level files kept open by --split-by-level (default: one per label bucket, at least {SPLIT_MAX_OPEN})",
+    )
+    parser.add_argument(
+        "--lemmatize",
+        action="store_true",
+        help='also match inflected headwords to their lemma in the label lists (e.g. "studies" -> "study")',
+    )
+    parser.add_argument(
+        "--lemma-exceptions",
+        type=Path,
+        default=EXCEPTIONS_FILE,
+        help="irregular forms file used with --lemmatize (default: lemma_exceptions.txt next to this script)",
+    )
     args = parser.parse_args()
 
     output_encoding = "utf-8-sig" if args.excel else args.output_encoding
@@ -510,7 +828,15 @@ def main() -> None:
     elif args.label:
         print("警告: 指定的标签文件未找到或为空")
 
-    convert_file_with_output_encoding(
+    lemma_table: Optional[Dict[str, str]] = None
+    if args.lemmatize and label_sets:
+        vocabulary: Set[str] = set()
+        for _, words in label_sets:
+            vocabulary |= words
+        lemma_table = load_lemma_table(vocabulary, exceptions_path=args.lemma_exceptions)
+        print(f"已加载词形对照表: {len(lemma_table)} 个词形")
+
+    split_counts = convert_file_with_output_encoding(
         args.input,
         args.output,
         input_encoding=args.encoding,
@@ -521,7 +847,20 @@ def main() -> None:
         level_sep=args.level_sep,
         merge_existing_output=args.merge_existing_output,
         label_sets=label_sets or None,
+        apkg_path=args.apkg,
+        deck_name=args.deck_name,
+        compresslevel=args.compress_level,
+        compress_threads=args.compress_threads,
+        rank_range=parse_rank_range(args.ranks) if args.ranks else None,
+        split_dir=args.split_by_level,
+        split_format=args.split_format,
+        split_max_open=args.split_max_open,
+        lemma_table=lemma_table,
     )
+    if split_counts:
+        print(f"已按级别拆分到 {args.split_by_level}:")
+        for lbl, n in split_counts.items():
+            print(f"  - {lbl}: {n} 行")
 
 
 if __name__ == "__main__":